@@ -0,0 +1,148 @@
+# Benchmark of the input fields: startup time, Tk widgets, Tk fonts and Python objects,
+# previous layout (one entry with its own fonts and two Tooltip objects per column) vs virtualized strip
+# Run from the repository folder: python benchmarks/input_strip_benchmark.py (needs a display)
+
+import gc
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import font as tkfont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gui_app_functions import VirtualEntryStrip
+
+
+# Entry with placeholder as it was before the shared fonts: two font copies per instance
+class LegacyEntryWithPlaceholder(tk.Entry):
+    def __init__(self, master=None, placeholder="", color='grey', **kwargs):
+        super().__init__(master, **kwargs)
+        self.placeholder = placeholder
+        self.placeholder_color = color
+        self.default_fg_color = self['fg'] if 'fg' in kwargs else 'black'
+        self.has_placeholder = False
+        current_font = tkfont.nametofont(self['font'])
+        self.normal_font = current_font.copy()
+        self.bold_font = current_font.copy()
+        self.bold_font.configure(weight='bold')
+        self.bind("<FocusIn>", self._on_focus_in)
+        self.bind("<FocusOut>", self._on_focus_out)
+        self._put_placeholder()
+    def _put_placeholder(self):
+        self.delete(0, 'end')
+        self.insert(0, self.placeholder)
+        self['fg'] = self.placeholder_color
+        self['font'] = self.normal_font
+        self.has_placeholder = True
+    def _on_focus_in(self, event):
+        if self.has_placeholder:
+            self.delete(0, 'end')
+            self['fg'] = self.default_fg_color
+            self['font'] = self.bold_font
+            self.has_placeholder = False
+    def _on_focus_out(self, event):
+        if not self.get():
+            self._put_placeholder()
+
+
+# Tooltip as it was before the shared TooltipManager: one object and two bindings per widget,
+# and a new Toplevel created every time the tip is shown
+class LegacyTooltip:
+    def __init__(self, widget, text, wraplength=300, timeout=4000):
+        self.widget = widget
+        self.text = text
+        self.wraplength = wraplength
+        self.timeout = timeout
+        self.tipwindow = None
+        self.close_id = None
+        self.root = widget.winfo_toplevel()
+        widget.bind("<Enter>", self.show_tip)
+        widget.bind("<Leave>", self.hide_tip)
+    def show_tip(self, event=None):
+        if self.tipwindow or not self.text:
+            return
+        self.tipwindow = tw = tk.Toplevel(self.widget)
+        tw.wm_overrideredirect(True)
+        tw.wm_attributes("-topmost", True)
+        label = tk.Label(
+            tw, text=self.text, justify='left',
+            background="#ffffe0", relief='solid', borderwidth=1,
+            font=("TkDefaultFont", 9), wraplength=self.wraplength
+        )
+        label.pack(ipadx=4, ipady=2)
+        tw.update_idletasks()
+        tw.wm_geometry(f"+{self.widget.winfo_rootx() + 20}+{self.widget.winfo_rooty() + self.widget.winfo_height() + 10}")
+        self.close_id = tw.after(self.timeout, self.hide_tip)
+    def hide_tip(self, event=None):
+        if self.tipwindow:
+            if self.close_id:
+                self.tipwindow.after_cancel(self.close_id)
+                self.close_id = None
+            self.tipwindow.destroy()
+            self.tipwindow = None
+
+
+# Generic columns like the ones of schema.json
+def make_columns(num_features):
+    return [{"name": f"x{i}", "label": f"X{i}", "default": i % 2, "description": f"Description for x{i}"}
+            for i in range(num_features)]
+
+
+# Count widgets and fonts living in the Tk interpreter
+def count_tk_objects(root):
+    widgets = 0
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        widgets += 1
+        stack.extend(widget.winfo_children())
+    return widgets, len(tkfont.names(root))
+
+
+# Previous layout: a label, an entry with its own fonts and two tooltips for every column
+def build_all_widgets(root, columns, font):
+    frame = tk.Frame(root)
+    frame.pack(fill="x")
+    tooltips = []
+    for element, column in enumerate(columns):
+        label = tk.Label(frame, text=column["label"], font=font)
+        label.grid(row=0, column=element, padx=2, pady=(5, 2))
+        entry = LegacyEntryWithPlaceholder(frame, placeholder=column["default"], width=14, font=font)
+        entry.grid(row=1, column=element, padx=3, pady=(2, 5), sticky="ew")
+        tooltips.append(LegacyTooltip(label, f"{column['description']} ➔ {column['name']}"))
+        tooltips.append(LegacyTooltip(entry, f'Default value for "{column["name"]}".\nYou can enter a different value.'))
+    return tooltips
+
+
+# Virtualized strip sized for a 900 px wide window
+def build_virtual_strip(root, columns, font):
+    strip = VirtualEntryStrip(root, columns, font=font, entry_width=14)
+    strip.pack(fill="x")
+    strip.fit_width(900)
+    return strip
+
+
+# Build the input fields in a fresh window and measure them
+def measure(builder, num_features):
+    root = tk.Tk()
+    root.geometry("900x650")
+    font = tkfont.Font(root, size=9)
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    start = time.perf_counter()
+    built = builder(root, make_columns(num_features), font)
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    python_objects = len(gc.get_objects()) - objects_before
+    widgets, fonts = count_tk_objects(root)
+    del built
+    root.destroy()
+    return elapsed, widgets, fonts, python_objects
+
+
+if __name__ == "__main__":
+    print(f"{'features':>8} {'layout':>12} {'startup [ms]':>13} {'widgets':>8} {'fonts':>6} {'py objects':>11}")
+    for num_features in (13, 200, 1000):
+        for name, builder in (("all widgets", build_all_widgets), ("virtual", build_virtual_strip)):
+            elapsed, widgets, fonts, python_objects = measure(builder, num_features)
+            print(f"{num_features:>8} {name:>12} {elapsed * 1000:>13.1f} {widgets:>8} {fonts:>6} {python_objects:>11}")
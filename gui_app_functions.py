@@ -1,25 +1,41 @@
 # Utility functions for the GUI app
 
 import tkinter as tk
+import numpy as np
 import pandas as pd
 import joblib
+import openpyxl
+import csv
+import hashlib
+import io
+import json
 import os
+import queue
+import sqlite3
 import sys
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import font as tkfont
 
 
 # Entry widget with placeholder support
 class EntryWithPlaceholder(tk.Entry):
+    _shared_fonts = {}  # Normal/bold font copies shared by all the entries with the same font
     def __init__(self, master=None, placeholder="", color='grey', **kwargs):
         super().__init__(master, **kwargs)
         self.placeholder = placeholder
         self.placeholder_color = color
         self.default_fg_color = self['fg'] if 'fg' in kwargs else 'black'
         self.has_placeholder = False
-        current_font = tkfont.nametofont(self['font'])
-        self.normal_font = current_font.copy()
-        self.bold_font = current_font.copy()
-        self.bold_font.configure(weight='bold')
+        font_key = (id(self.tk), str(self['font']))
+        if font_key not in EntryWithPlaceholder._shared_fonts:
+            current_font = tkfont.nametofont(self['font'])
+            bold_font = current_font.copy()
+            bold_font.configure(weight='bold')
+            EntryWithPlaceholder._shared_fonts[font_key] = (current_font.copy(), bold_font)
+        self.normal_font, self.bold_font = EntryWithPlaceholder._shared_fonts[font_key]
         self.bind("<FocusIn>", self._on_focus_in)
         self.bind("<FocusOut>", self._on_focus_out)
         self._put_placeholder()
@@ -56,59 +72,253 @@ class EntryWithPlaceholder(tk.Entry):
             self.has_placeholder = False
 
 
-# Tooltip class for widgets
-class Tooltip:
-    def __init__(self, widget, text, wraplength=300, timeout=4000):
+# State of one input column, bound to an entry widget only while the column is visible
+class InputCell:
+    def __init__(self, placeholder=""):
+        self._placeholder = placeholder
+        self.text = ""
+        self.widget = None
+    @property
+    def placeholder(self):
+        return self._placeholder
+    @placeholder.setter
+    def placeholder(self, value):
+        self._placeholder = value
+        if self.widget is not None:
+            self.widget.placeholder = value
+    def attach(self, widget):
         self.widget = widget
-        self.text = text
+        widget.placeholder = self._placeholder
+        if self.text:
+            widget.set_value(self.text)
+        else:
+            widget.delete(0, 'end')
+            widget.has_placeholder = False
+            widget.reset()
+    def detach(self):
+        self.text = "" if self.widget.has_placeholder else self.widget.get()
+        self.widget = None
+    def _put_placeholder(self):
+        if self.widget is not None:
+            self.widget._put_placeholder()
+        else:
+            self.text = ""
+    def get(self):
+        if self.widget is not None:
+            return self.widget.get()
+        return self.text if self.text else str(self._placeholder)
+    def get_value_or_placeholder(self):
+        if self.widget is not None:
+            return self.widget.get_value_or_placeholder()
+        return self.text if self.text.strip() else self._placeholder
+    def delete(self, first, last=None):
+        if self.widget is not None:
+            self.widget.delete(first, last)
+        else:
+            self.text = ""
+    def reset(self):
+        if self.widget is not None:
+            self.widget.reset()
+        else:
+            self.text = ""
+    def set_value(self, value):
+        if self.widget is not None:
+            self.widget.set_value(value)
+        else:
+            self.text = "" if value in ("", None) else str(value)
+
+
+# Horizontally virtualized strip of labelled entries: widgets are created only for the visible columns
+class VirtualEntryStrip(tk.Frame):
+    def __init__(self, master, columns, font=None, entry_width=14, on_return=None,
+                 label_tip="{description} ➔ {name}",
+                 entry_tip='Default value for "{name}".\nYou can enter a different value.', **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.cells = [InputCell(col.get("default", "")) for col in columns]
+        self.font = font
+        self.entry_width = entry_width
+        self.on_return = on_return
+        self.label_tip = label_tip
+        self.entry_tip = entry_tip
+        self.slots = []
+        self.first = 0
+        self.visible = 0
+        self.slot_width = None
+        self.scrollbar = tk.Scrollbar(self, orient="horizontal", command=self.xview)
+    def _create_slot(self):
+        column = len(self.slots)
+        label = tk.Label(self, font=self.font)
+        label.grid(row=0, column=column, padx=2, pady=(5, 2))
+        entry = EntryWithPlaceholder(self, width=self.entry_width, font=self.font)
+        entry.grid(row=1, column=column, padx=3, pady=(2, 5), sticky="ew")
+        if self.on_return:
+            entry.bind("<Return>", self.on_return)
+        entry.bind("<Tab>", lambda event, k=column: self._on_tab(k, 1))
+        entry.bind("<<PrevWindow>>", lambda event, k=column: self._on_tab(k, -1))
+        for widget in (label, entry):
+            widget.bind("<Shift-MouseWheel>", self._on_wheel)
+        self.slots.append({"label": label, "entry": entry, "cell": None})
+    def fit_width(self, width):
+        if not self.cells:
+            return
+        if self.slot_width is None:
+            if not self.slots:
+                self._create_slot()
+            slot = self.slots[0]
+            self.slot_width = max(slot["label"].winfo_reqwidth() + 4, slot["entry"].winfo_reqwidth() + 6)
+        self.set_visible_count(max(1, min(len(self.cells), int(width) // self.slot_width)))
+    def set_visible_count(self, count):
+        if count == self.visible:
+            return
+        while len(self.slots) < count:
+            self._create_slot()
+        for k, slot in enumerate(self.slots):
+            if k < count:
+                slot["label"].grid()
+                slot["entry"].grid()
+            else:
+                if slot["cell"] is not None:
+                    slot["cell"].detach()
+                    slot["cell"] = None
+                slot["label"].grid_remove()
+                slot["entry"].grid_remove()
+        self.visible = count
+        self.show(self.first)
+    def show(self, first):
+        num_cells = len(self.cells)
+        first = max(0, min(int(first), num_cells - self.visible))
+        targets = self.cells[first:first + self.visible]
+        changed = [k for k, slot in enumerate(self.slots[:self.visible]) if slot["cell"] is not targets[k]]
+        for k in changed:
+            if self.slots[k]["cell"] is not None:
+                self.slots[k]["cell"].detach()
+                self.slots[k]["cell"] = None
+        for k in changed:
+            slot = self.slots[k]
+            column = self.columns[first + k]
+            name = column["name"]
+            description = column.get("description", "No description available.")
+            slot["label"].config(text=column.get("label", name))
+            add_tooltip(slot["label"], self.label_tip.format(name=name, description=description))
+            add_tooltip(slot["entry"], self.entry_tip.format(name=name, description=description))
+            targets[k].attach(slot["entry"])
+            slot["cell"] = targets[k]
+        self.first = first
+        self.scrollbar.set(first / num_cells, (first + self.visible) / num_cells)
+        if self.visible < num_cells:
+            self.scrollbar.grid(row=2, column=0, columnspan=self.visible, sticky="ew")
+        else:
+            self.scrollbar.grid_remove()
+    def xview(self, *args):
+        if args[0] == "moveto":
+            self.show(round(float(args[1]) * len(self.cells)))
+        elif args[0] == "scroll":
+            amount = int(args[1]) * (self.visible if args[2] == "pages" else 1)
+            self.show(self.first + amount)
+    def _on_wheel(self, event):
+        self.xview("scroll", -1 if event.delta > 0 else 1, "units")
+    # Tab out of the last visible entry (Shift-Tab out of the first one) scrolls to the next (previous) column
+    def _on_tab(self, k, step):
+        edge = self.visible - 1 if step > 0 else 0
+        first = self.first + step
+        if k != edge or not 0 <= first <= len(self.cells) - self.visible:
+            return None
+        self.show(first)
+        self.slots[k]["entry"].focus_set()
+        return "break"
+
+
+# Tooltip manager: one reusable popup window for all the registered widgets, shown after a short delay
+class TooltipManager:
+    def __init__(self, root, delay=400, wraplength=300, timeout=4000):
+        self.root = root
+        self.delay = delay
         self.wraplength = wraplength
         self.timeout = timeout
-        self.tipwindow = None
+        self.texts = {}
+        self.sizes = {}
+        self.popup = None
+        self.label = None
+        self.current = None
+        self.show_id = None
         self.close_id = None
-        self.root = widget.winfo_toplevel()
-        widget.bind("<Enter>", self.show_tip)
-        widget.bind("<Leave>", self.hide_tip)
-    def show_tip(self, event=None):
-        if self.tipwindow or not self.text:
-            return
-        self.tipwindow = tw = tk.Toplevel(self.widget)
-        tw.wm_overrideredirect(True)
-        tw.wm_attributes("-topmost", True)
-        label = tk.Label(
-            tw, text=self.text, justify='left',
+    def register(self, widget, text):
+        key = str(widget)
+        if key not in self.texts:
+            widget.bind("<Enter>", self._on_enter, add="+")
+            widget.bind("<Leave>", self.hide, add="+")
+            widget.bind("<Destroy>", lambda event, key=key: self.texts.pop(key, None), add="+")
+        self.texts[key] = text
+    def _create_popup(self):
+        self.popup = tk.Toplevel(self.root)
+        self.popup.withdraw()
+        self.popup.wm_overrideredirect(True)
+        self.popup.wm_attributes("-topmost", True)
+        self.label = tk.Label(
+            self.popup, justify='left',
             background="#ffffe0", relief='solid', borderwidth=1,
             font=("TkDefaultFont", 9), wraplength=self.wraplength
         )
-        label.pack(ipadx=4, ipady=2)
-        tw.update_idletasks()
-        widget_x = self.widget.winfo_rootx()
-        widget_y = self.widget.winfo_rooty()
-        widget_h = self.widget.winfo_height()
-        tip_w = tw.winfo_width()
-        tip_h = tw.winfo_height()
-        root_x = self.root.winfo_rootx()
-        root_y = self.root.winfo_rooty()
-        root_w = self.root.winfo_width()
-        root_h = self.root.winfo_height()
+        self.label.pack(ipadx=4, ipady=2)
+    def _on_enter(self, event):
+        self.hide()
+        self.current = event.widget
+        self.show_id = self.root.after(self.delay, self.show)
+    def show(self):
+        self.show_id = None
+        widget = self.current
+        text = self.texts.get(str(widget))
+        if not text or not widget.winfo_exists():
+            return
+        if self.popup is None:
+            self._create_popup()
+        self.label.config(text=text)
+        size = self.sizes.get(text)
+        if size is None:
+            self.popup.update_idletasks()
+            size = self.sizes[text] = (self.popup.winfo_reqwidth(), self.popup.winfo_reqheight())
+        tip_w, tip_h = size
+        top = widget.winfo_toplevel()
+        widget_x = widget.winfo_rootx()
+        widget_y = widget.winfo_rooty()
+        root_x = top.winfo_rootx()
+        root_y = top.winfo_rooty()
         x = widget_x + 20
-        y = widget_y + widget_h + 10
-        if x + tip_w > root_x + root_w:
-            x = root_x + root_w - tip_w - 10
-        if y + tip_h > root_y + root_h:
+        y = widget_y + widget.winfo_height() + 10
+        if x + tip_w > root_x + top.winfo_width():
+            x = root_x + top.winfo_width() - tip_w - 10
+        if y + tip_h > root_y + top.winfo_height():
             y = widget_y - tip_h - 10
         if x < root_x:
             x = root_x + 10
         if y < root_y:
             y = root_y + 10
-        tw.wm_geometry(f"+{x}+{y}")
-        self.close_id = tw.after(self.timeout, self.hide_tip)
-    def hide_tip(self, event=None):
-        if self.tipwindow:
-            if self.close_id:
-                self.tipwindow.after_cancel(self.close_id)
-                self.close_id = None
-            self.tipwindow.destroy()
-            self.tipwindow = None
+        self.popup.wm_geometry(f"+{x}+{y}")
+        self.popup.deiconify()
+        self.close_id = self.root.after(self.timeout, self.hide)
+    def hide(self, event=None):
+        if self.show_id:
+            self.root.after_cancel(self.show_id)
+            self.show_id = None
+        if self.close_id:
+            self.root.after_cancel(self.close_id)
+            self.close_id = None
+        if self.popup is not None:
+            self.popup.withdraw()
+
+
+# Tooltip managers, one for each Tk application
+_tooltip_managers = {}
+
+
+# Show a tooltip on a widget (calling it again on the same widget replaces the text)
+def add_tooltip(widget, text):
+    root = widget._root()
+    manager = _tooltip_managers.get(str(root.tk))
+    if manager is None or manager.root is not root:
+        manager = _tooltip_managers[str(root.tk)] = TooltipManager(root)
+    manager.register(widget, text)
 
 
 # Return absolute path of a resource file
@@ -120,48 +330,916 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+# Built-in schema, used when no schema.json is found next to the program
+DEFAULT_SCHEMA = {
+    "inputs": [
+        {"name": name, "label": name.upper(), "default": default, "description": f"Description for {name}"}
+        for name, default in zip("abcdefghijkl", [0, 1] * 6)
+    ] + [
+        {"name": "threshold", "label": "Threshold", "default": 5, "description": "Description for threshold"}
+    ],
+    "outputs": ["output", "output_flag"],
+}
+
+
+# Dataset columns (inputs, with the threshold last, and outputs) with precomputed name -> index maps
+class Schema:
+    def __init__(self, inputs, outputs):
+        self.inputs = [dict(col) for col in inputs]
+        self.input_names = [col["name"] for col in self.inputs]
+        self.input_labels = [col.get("label", col["name"]) for col in self.inputs]
+        self.defaults = [col.get("default", "") for col in self.inputs]
+        self.descriptions = {col["name"]: col.get("description", "No description available.") for col in self.inputs}
+        self.non_negative = [col.get("non_negative", True) for col in self.inputs]
+        self.output_names = [col if isinstance(col, str) else col["name"] for col in outputs]
+        # The calculation fills exactly two outputs: the prediction and its flag (optional "role", else in this order)
+        roles = [None if isinstance(col, str) else col.get("role") for col in outputs]
+        if len(roles) != 2 or any(role not in (None, "prediction", "flag") for role in roles) or \
+                (roles[0] is not None and roles[0] == roles[1]):
+            raise ValueError('The schema must have exactly two outputs: the prediction and its flag '
+                             '(optional "role": "prediction" or "flag").')
+        if roles[0] == "flag" or roles[1] == "prediction":
+            self.flag_name, self.prediction_name = self.output_names
+        else:
+            self.prediction_name, self.flag_name = self.output_names
+        self.columns = self.input_names + self.output_names
+        if len(set(self.columns)) != len(self.columns):
+            raise ValueError("Column names in the schema must be unique.")
+        self.num_inputs = len(self.input_names)
+        self.num_outputs = len(self.output_names)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.label_of = dict(zip(self.input_names, self.input_labels))
+        # Positions in the Treeview values, where column 0 is the row number
+        self.value_index = {name: i + 1 for i, name in enumerate(self.columns)}
+        self.input_slice = slice(1, 1 + self.num_inputs)
+        self.output_slice = slice(1 + self.num_inputs, 1 + len(self.columns))
+
+
+# Load the schema from a JSON file (the built-in schema is used if the file does not exist)
+def load_schema(schema_path=resource_path("schema.json")):
+    if os.path.exists(schema_path):
+        with open(schema_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    else:
+        config = DEFAULT_SCHEMA
+    return Schema(config["inputs"], config["outputs"])
+
+
+# Per-user folder used to cache parsed Excel tables between sessions, and its size cap (least recently used first out)
+TABLE_CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+                               or os.path.join(os.path.expanduser("~"), ".cache"), "gui_app", "table_cache")
+TABLE_CACHE_MAX_BYTES = 1 << 30
+
+
+# Create the cache folder readable by the current user only (None if it cannot be trusted)
+def _table_cache_dir():
+    try:
+        os.makedirs(TABLE_CACHE_DIR, mode=0o700, exist_ok=True)
+        if hasattr(os, "getuid"):
+            if os.stat(TABLE_CACHE_DIR).st_uid != os.getuid():
+                return None
+            os.chmod(TABLE_CACHE_DIR, 0o700)
+        return TABLE_CACHE_DIR
+    except OSError:
+        return None
+
+
+# Remove the least recently used cached tables until the cache fits in max_bytes
+def evict_table_cache(cache_dir, max_bytes=TABLE_CACHE_MAX_BYTES):
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".csv"):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+            total -= size
+        except OSError:
+            pass
+
+
+# Fingerprint of a file (content hash plus modification time)
+def file_fingerprint(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return f"{digest.hexdigest()}_{os.path.getmtime(path):.0f}"
+
+
+# Names of the sheets of an Excel workbook (cells are not loaded)
+def list_excel_sheets(path):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+# Convert a block of raw rows into a DataFrame of stripped strings (empty cells become "")
+def _rows_to_frame(rows, columns):
+    num_columns = len(columns)
+    rows = [tuple(row[:num_columns]) + (None,) * (num_columns - len(row)) for row in rows]
+    frame = pd.DataFrame(rows, columns=columns, dtype=object)
+    return frame.map(lambda value: "" if value is None else str(value).strip())
+
+
+# Stream an Excel sheet in chunks of rows with a read-only reader (the workbook is never fully loaded)
+def iter_excel_chunks(path, sheet_name=None, chunk_size=10000, progress=None):
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        total_rows = sheet.max_row - 1 if sheet.max_row else None
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = ["" if name is None else str(name).strip() for name in header]
+        chunk = []
+        read_rows = 0
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                read_rows += len(chunk)
+                yield _rows_to_frame(chunk, columns)
+                chunk = []
+                if progress:
+                    progress(read_rows, total_rows)
+        if chunk or read_rows == 0:
+            read_rows += len(chunk)
+            yield _rows_to_frame(chunk, columns)
+            if progress:
+                progress(read_rows, total_rows)
+    finally:
+        workbook.close()
+
+
+# Stream a CSV file in chunks of rows (all values read as stripped strings)
+def iter_csv_chunks(path, chunk_size=10000, progress=None):
+    read_rows = 0
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        read_rows += len(chunk)
+        yield chunk.map(str.strip)
+        if progress:
+            progress(read_rows, None)
+
+
+# Stream a CSV or Excel table in chunks, re-using the on-disk cache when the same workbook was already parsed.
+# The cache holds the parsed strings as plain CSV, written while the chunks stream (CSV sources are not cached)
+def iter_table_chunks(path, sheet_name=None, chunk_size=10000, progress=None, use_cache=True):
+    if path.endswith(".csv"):
+        yield from iter_csv_chunks(path, chunk_size, progress)
+        return
+    cache_dir = _table_cache_dir() if use_cache else None
+    if cache_dir is None:
+        yield from iter_excel_chunks(path, sheet_name, chunk_size, progress)
+        return
+    key = f"{file_fingerprint(path)}_{sheet_name or ''}"
+    cache_path = os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".csv")
+    if os.path.exists(cache_path):
+        os.utime(cache_path)
+        with open(cache_path, "r", newline="", encoding="utf-8") as f:
+            columns = next(csv.reader(f), [])
+        empty = True
+        for chunk in iter_csv_chunks(cache_path, chunk_size, progress):
+            chunk.columns = columns
+            empty = False
+            yield chunk
+        if empty:
+            yield pd.DataFrame(columns=columns, dtype=object)
+        return
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        cache_file = open(temp_path, "w", newline="", encoding="utf-8")
+    except OSError:
+        cache_file = None
+    written = False
+    try:
+        for chunk in iter_excel_chunks(path, sheet_name, chunk_size, progress):
+            if cache_file is not None:
+                try:
+                    chunk.to_csv(cache_file, header=not written, index=False)
+                    written = True
+                except OSError:
+                    cache_file.close()
+                    cache_file = None
+            yield chunk
+        if cache_file is not None and written:
+            cache_file.close()
+            cache_file = None
+            try:
+                os.replace(temp_path, cache_path)
+                evict_table_cache(cache_dir)
+            except OSError:
+                pass
+    finally:
+        if cache_file is not None:
+            cache_file.close()
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+# Range monitor of the scaled inputs: values clipped below min / above max and streaming histograms per column
+class RangeMonitor:
+    def __init__(self, column_names, bins=10):
+        self.column_names = list(column_names)
+        self.bins = bins
+        self.reset()
+    def reset(self):
+        num_columns = len(self.column_names)
+        self.count = 0
+        self.below = np.zeros(num_columns, dtype=np.int64)
+        self.above = np.zeros(num_columns, dtype=np.int64)
+        # Bin 0 is below min, bin bins + 1 is above max
+        self.histograms = np.zeros((num_columns, self.bins + 2), dtype=np.int64)
+    def update(self, scaled):
+        scaled = np.asarray(scaled, dtype=float)
+        if scaled.size == 0:
+            return
+        num_columns = len(self.column_names)
+        below = scaled < 0
+        above = scaled > 1
+        self.count += len(scaled)
+        self.below += below.sum(axis=0)
+        self.above += above.sum(axis=0)
+        with np.errstate(invalid="ignore"):
+            bin_index = np.clip(scaled * self.bins, 0, self.bins - 1).astype(np.int64) + 1
+        bin_index[below] = 0
+        bin_index[above] = self.bins + 1
+        bin_index += np.arange(num_columns) * (self.bins + 2)
+        finite = np.isfinite(scaled)
+        flat_index = bin_index.ravel() if finite.all() else bin_index[finite]
+        self.histograms += np.bincount(flat_index, minlength=num_columns * (self.bins + 2)).reshape(num_columns, -1)
+    def summary(self):
+        count = max(self.count, 1)
+        return pd.DataFrame({
+            "rows": self.count,
+            "below min %": 100 * self.below / count,
+            "above max %": 100 * self.above / count,
+            "clipped %": 100 * (self.below + self.above) / count,
+        }, index=self.column_names)
+    def histogram_labels(self):
+        step = 100 / self.bins
+        return ["< min"] + [f"{i * step:g}-{(i + 1) * step:g}%" for i in range(self.bins)] + ["> max"]
+    def histogram_frame(self):
+        return pd.DataFrame(self.histograms, index=self.column_names, columns=self.histogram_labels())
+
+
+# Parse a tab-, comma- or semicolon-separated block of text (e.g. copied from a spreadsheet) in one pass
+# Columns are matched by header name when the first line contains known names, otherwise by position
+def parse_pasted_table(text, column_names):
+    lines = text.strip("\r\n").splitlines()
+    if not lines or not lines[0].strip():
+        return pd.DataFrame(columns=column_names)
+    first_line = lines[0]
+    sep = "\t" if "\t" in first_line else ("," if "," in first_line else (";" if ";" in first_line else "\t"))
+    frame = pd.read_csv(io.StringIO(text.strip("\r\n")), sep=sep, header=None, dtype=str,
+                        keep_default_na=False, skip_blank_lines=True, quoting=csv.QUOTE_MINIMAL)
+    frame = frame.apply(lambda column: column.str.strip())
+    known_columns = set(column_names)
+    header = frame.iloc[0].tolist()
+    if any(name in known_columns for name in header):
+        frame = frame.iloc[1:]
+        frame.columns = header
+        frame = frame.loc[:, [name in known_columns for name in header]]
+        frame = frame.loc[:, ~frame.columns.duplicated()]
+    else:
+        frame = frame.iloc[:, :len(column_names)]
+        frame.columns = column_names[:frame.shape[1]]
+    return frame.reset_index(drop=True)
+
+
+# Load a file once and reuse it until the file changes on disk
+_file_cache = {}
+def load_cached(path, loader):
+    key = (loader, os.path.abspath(path))
+    mtime = os.path.getmtime(path)
+    cached = _file_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, loader(path))
+        _file_cache[key] = cached
+    return cached[1]
+
+
+# Load the model (cached)
+def load_model(model_path=resource_path("model.pkl")):
+    return load_cached(model_path, joblib.load)
+
+
+# Read the normalization parameters file (module-level so that it is a stable load_cached key)
+def _read_norm_params(path):
+    return pd.read_csv(path, index_col=0)
+
+
+# Load the normalization parameters (cached)
+def load_norm_params(norm_params_path=resource_path("normalization_params.csv")):
+    return load_cached(norm_params_path, _read_norm_params)
+
+
+# Normalize a 2D input matrix with the min/max of each column and clip to [0, 1] (the monitor sees the unclipped values)
+def normalize_inputs(values, column_names, norm_params, monitor=None):
+    min_vals = norm_params["min"].reindex(column_names).to_numpy(dtype=float)
+    max_vals = norm_params["max"].reindex(column_names).to_numpy(dtype=float)
+    scaled = (np.asarray(values, dtype=float) - min_vals) / (max_vals - min_vals)
+    if monitor is not None:
+        monitor.update(scaled)
+    return np.clip(scaled, 0, 1)
+
+
+# Predict a normalized 2D input matrix, split in chunks scored on several threads if n_jobs > 1
+def predict_batch(model, values, column_names, n_jobs=1, chunk_size=50000):
+    frame = pd.DataFrame(values, columns=column_names)
+    if n_jobs <= 1 or len(frame) <= chunk_size:
+        return np.asarray(model.predict(frame), dtype=float)
+    chunks = [frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size)]
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        return np.concatenate([np.asarray(pred, dtype=float) for pred in pool.map(model.predict, chunks)])
+
+
+# Change of the prediction when each input column is moved by each step (rows x features x steps)
+def sensitivity_analysis(base_values, column_names, steps, model, norm_params, n_jobs=1, max_batch=2000000):
+    base_values = np.asarray(base_values, dtype=float)
+    steps = np.asarray(steps, dtype=float)
+    num_rows, num_features = base_values.shape
+    num_steps = len(steps)
+    feature_index = np.arange(num_features)
+    base_pred = predict_batch(model, normalize_inputs(base_values, column_names, norm_params), column_names, n_jobs)
+    changes = np.empty((num_rows, num_features, num_steps))
+    rows_per_batch = max(1, max_batch // (num_features * num_steps * num_features))
+    for start in range(0, num_rows, rows_per_batch):
+        block = base_values[start:start + rows_per_batch]
+        perturbed = np.repeat(block[:, None, None, :], num_features, axis=1).repeat(num_steps, axis=2)
+        perturbed[:, feature_index, :, feature_index] += steps
+        flat = normalize_inputs(perturbed.reshape(-1, num_features), column_names, norm_params)
+        pred = predict_batch(model, flat, column_names, n_jobs).reshape(len(block), num_features, num_steps)
+        changes[start:start + len(block)] = pred - base_pred[start:start + len(block), None, None]
+    return changes
+
+
+# Summarize a sensitivity cube: mean change per feature and step, plus the mean absolute slope
+def sensitivity_summary(changes, column_names, steps):
+    steps = np.asarray(steps, dtype=float)
+    summary = pd.DataFrame(changes.mean(axis=0), index=column_names, columns=[f"{step:+g}" for step in steps])
+    nonzero = steps != 0
+    slopes = np.abs(changes[:, :, nonzero] / steps[nonzero])
+    summary["mean |slope|"] = slopes.mean(axis=(0, 2)) if nonzero.any() else np.nan
+    return summary.sort_values("mean |slope|", ascending=False)
+
+
+# Error codes of a parsed input cell
+CELL_OK = 0
+CELL_EMPTY = 1
+CELL_NOT_NUMERIC = 2
+CELL_NEGATIVE = 3
+
+
+# Schema-driven validator: parses input cells once into floats plus an error code per cell
+class InputValidator:
+    def __init__(self, columns, defaults=None, non_negative=True):
+        self.columns = list(columns)
+        self.non_negative = np.broadcast_to(np.asarray(non_negative, dtype=bool), (len(self.columns),))
+        self.set_defaults(defaults if defaults is not None else [""] * len(self.columns))
+    def set_defaults(self, defaults):
+        values, codes = self.parse_rows([defaults])
+        self.default_values = np.where(codes[0] == CELL_OK, np.round(values[0]), np.nan)
+        self.default_codes = np.where(codes[0] == CELL_OK, CELL_OK, CELL_EMPTY).astype(np.uint8)
+    def parse_rows(self, rows):
+        num_columns = len(self.columns)
+        cells = pd.Series(np.asarray(list(rows), dtype=object).reshape(-1), dtype=object).fillna("")
+        stripped = cells.astype(str).str.strip()
+        values = pd.to_numeric(stripped, errors="coerce").to_numpy(dtype=float).reshape(-1, num_columns)
+        empty = (stripped == "").to_numpy().reshape(-1, num_columns)
+        codes = np.full(values.shape, CELL_OK, dtype=np.uint8)
+        codes[(values < 0) & self.non_negative] = CELL_NEGATIVE
+        codes[~np.isfinite(values)] = CELL_NOT_NUMERIC
+        codes[empty] = CELL_EMPTY
+        return values, codes
+    def usable(self, codes):
+        return (codes == CELL_OK) | (codes == CELL_NEGATIVE)
+    def clean(self, values, codes):
+        valid = codes == CELL_OK
+        return np.where(valid, np.round(values), np.nan), np.where(valid, CELL_OK, CELL_EMPTY).astype(np.uint8)
+    def correct(self, values, codes):
+        valid = codes == CELL_OK
+        return np.where(valid, np.round(values), self.default_values), np.where(valid, CELL_OK, self.default_codes).astype(np.uint8)
+    def format_cells(self, values, codes):
+        cells = np.full(values.shape, "", dtype=object)
+        valid = codes == CELL_OK
+        cells[valid] = [str(int(round(value))) for value in values[valid]]
+        return cells
+
+
+# Hash of a file (cached until the file changes), None if it cannot be read
+def file_hash(path):
+    try:
+        return load_cached(path, file_fingerprint).split("_")[0]
+    except OSError:
+        return None
+
+
+# Append-only audit log of the calculation runs: SQLite in WAL mode, written in batches by a background thread.
+# Runs that cannot be written (locked or unreachable database) are kept and retried with a growing delay;
+# error holds the last failure (None while the log is healthy) and pending the number of runs not written yet
+class AuditLog:
+    def __init__(self, path, batch_size=200, flush_interval=1.0, connect_timeout=5.0, max_retry_delay=30.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.connect_timeout = connect_timeout
+        self.max_retry_delay = max_retry_delay
+        self.error = None
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+        self.closed = False
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, name="audit-log", daemon=True)
+        self.thread.start()
+    # The file hashes must describe the files that were scored: pass the ones taken at scoring time
+    # (otherwise they are computed now, never later on the writer thread)
+    def record(self, model_path, norm_params_path, column_names, row_ids, inputs, thresholds, predictions, flags,
+               row_numbers=None, model_hash=None, norm_params_hash=None):
+        if self.closed:
+            raise RuntimeError("The audit log is closed.")
+        with self.pending_lock:
+            self.pending += 1
+        self.queue.put({
+            "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+            "model_path": model_path,
+            "model_hash": model_hash if model_hash is not None else file_hash(model_path),
+            "norm_params_path": norm_params_path,
+            "norm_params_hash": norm_params_hash if norm_params_hash is not None else file_hash(norm_params_path),
+            "column_names": list(column_names),
+            "row_ids": list(row_ids),
+            "row_numbers": list(row_numbers) if row_numbers is not None else [None] * len(row_ids),
+            "inputs": np.asarray(inputs, dtype=float),
+            "thresholds": np.broadcast_to(np.asarray(thresholds, dtype=float), (len(row_ids),)),
+            "predictions": np.asarray(predictions, dtype=float),
+            "flags": list(flags),
+        })
+    # Stop the writer after the pending runs are written; returns the number of runs that could not be written
+    def close(self, timeout=10):
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(timeout)
+        return self.pending
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=self.connect_timeout)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, timestamp TEXT, model_path TEXT, model_hash TEXT, "
+            "norm_params_path TEXT, norm_params_hash TEXT, column_names TEXT, num_rows INTEGER)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS run_rows (run_id INTEGER, row_id TEXT, inputs BLOB, threshold REAL, "
+            "prediction REAL, output_flag TEXT, row_number INTEGER)"
+        )
+        # Logs written before the row number was recorded get the new column (empty for the old rows)
+        if "row_number" not in [row[1] for row in connection.execute("PRAGMA table_info(run_rows)")]:
+            connection.execute("ALTER TABLE run_rows ADD COLUMN row_number INTEGER")
+        return connection
+    def _write(self, connection, runs):
+        with connection:
+            for run in runs:
+                cursor = connection.execute(
+                    "INSERT INTO runs (timestamp, model_path, model_hash, norm_params_path, norm_params_hash, "
+                    "column_names, num_rows) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run["timestamp"], run["model_path"], run["model_hash"], run["norm_params_path"],
+                     run["norm_params_hash"], json.dumps(run["column_names"]), len(run["row_ids"]))
+                )
+                connection.executemany(
+                    "INSERT INTO run_rows (run_id, row_id, row_number, inputs, threshold, prediction, output_flag) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, row_id, row_number, inputs.tobytes(),
+                      None if np.isnan(threshold) else float(threshold), None if np.isnan(pred) else float(pred), flag)
+                     for row_id, row_number, inputs, threshold, pred, flag
+                     in zip(run["row_ids"], run["row_numbers"], run["inputs"], run["thresholds"], run["predictions"],
+                            run["flags"])]
+                )
+    def _writer(self):
+        connection = None
+        runs = []
+        stopping = False
+        retry_at = 0.0
+        retry_delay = self.flush_interval
+        while True:
+            timeout = max(0.0, retry_at - time.monotonic()) if runs else self.flush_interval
+            try:
+                runs.append(self.queue.get(timeout=timeout))
+                while len(runs) < self.batch_size:
+                    runs.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            if None in runs:
+                stopping = True
+                runs = [run for run in runs if run is not None]
+            if runs and time.monotonic() >= retry_at:
+                try:
+                    if connection is None:
+                        connection = self._open()
+                    self._write(connection, runs)
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    retry_at = time.monotonic() + retry_delay
+                    retry_delay = min(2 * retry_delay, self.max_retry_delay)
+                else:
+                    with self.pending_lock:
+                        self.pending -= len(runs)
+                    runs = []
+                    self.error = None
+                    retry_delay = self.flush_interval
+            if stopping and not runs:
+                break
+        if connection is not None:
+            connection.close()
+
+
+# Output flag codes and their labels (indexed by flag code)
+FLAG_OK = 0
+FLAG_HIGH = 1
+FLAG_ERR = 2
+FLAG_LABELS = np.array(["OK", "HIGH", "ERR"], dtype=object)
+
+
+# Compare predictions with thresholds in one vectorized pass (FLAG_OK, FLAG_HIGH or FLAG_ERR when either is NaN)
+def threshold_codes(predictions, thresholds):
+    predictions = np.asarray(predictions, dtype=float)
+    thresholds = np.broadcast_to(np.asarray(thresholds, dtype=float), predictions.shape)
+    codes = (predictions >= thresholds).astype(np.uint8)
+    codes[np.isnan(predictions) | np.isnan(thresholds)] = FLAG_ERR
+    return codes
+
+
+# Same as threshold_codes, decoded to the flag labels ("OK", "HIGH" or "ERR")
+def apply_threshold(predictions, thresholds):
+    return FLAG_LABELS[threshold_codes(predictions, thresholds)]
+
+
+# Output column text of the predictions (rounded integer, empty when there is no prediction)
+def format_outputs(predictions):
+    predictions = np.asarray(predictions, dtype=float)
+    text = np.full(predictions.shape, "", dtype=object)
+    valid = np.isfinite(predictions)
+    text[valid] = np.round(predictions[valid]).astype(np.int64).astype(str)
+    return text
+
+
+# Typed per-row data of the table rows, in arrays indexed by a slot number (slots of removed rows are re-used):
+# parsed input values and cell codes, float32 prediction, uint8 flag code and a bitmask of the missing/invalid
+# model inputs (every input but the last one, the threshold). Strings are produced only for display, export and reports
+class RowStore:
+    NO_OUTPUT = 255  # Flag code of the rows without calculated outputs
+    def __init__(self, column_names, capacity=1024):
+        self.column_names = list(column_names)
+        self.model_columns = np.array(self.column_names[:-1], dtype=object)
+        self.capacity = capacity
+        self.clear()
+    def clear(self):
+        num_columns = len(self.column_names)
+        self.slots = {}
+        self.free = []
+        self.values = np.full((self.capacity, num_columns), np.nan)
+        self.codes = np.full((self.capacity, num_columns), CELL_EMPTY, dtype=np.uint8)
+        self.predictions = np.full(self.capacity, np.nan, dtype=np.float32)
+        self.flags = np.full(self.capacity, self.NO_OUTPUT, dtype=np.uint8)
+        self.missing = np.zeros((self.capacity, (len(self.model_columns) + 7) // 8), dtype=np.uint8)
+    def __contains__(self, item):
+        return item in self.slots
+    def _grow(self, size):
+        capacity = max(size, 2 * len(self.flags))
+        for name in ("values", "codes", "predictions", "flags", "missing"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+    def _allocate(self, items):
+        slots = np.empty(len(items), dtype=np.int64)
+        new = np.zeros(len(items), dtype=bool)
+        for row, item in enumerate(items):
+            slot = self.slots.get(item)
+            if slot is None:
+                slot = self.free.pop() if self.free else len(self.slots)
+                self.slots[item] = slot
+                new[row] = True
+            slots[row] = slot
+        if len(slots) and slots.max() >= len(self.flags):
+            self._grow(slots.max() + 1)
+        self.predictions[slots[new]] = np.nan
+        self.flags[slots[new]] = self.NO_OUTPUT
+        self.missing[slots[new]] = 0
+        return slots
+    def _lookup(self, items):
+        return np.fromiter((self.slots[item] for item in items), dtype=np.int64, count=len(items))
+    def forget(self, items):
+        for item in items:
+            slot = self.slots.pop(item, None)
+            if slot is not None:
+                self.free.append(slot)
+        if not self.slots:
+            self.clear()
+    # Parsed inputs
+    def unparsed(self, items):
+        return [item for item in items if item not in self.slots]
+    def set_inputs(self, items, values, codes):
+        slots = self._allocate(items)
+        self.values[slots] = values
+        self.codes[slots] = codes
+    def get_inputs(self, items):
+        slots = self._lookup(items)
+        return self.values[slots], self.codes[slots]
+    # Calculated outputs
+    def has_outputs(self):
+        slots = np.fromiter(self.slots.values(), dtype=np.int64, count=len(self.slots))
+        return bool((self.flags[slots] != self.NO_OUTPUT).any())
+    def with_outputs(self, items):
+        return [item for item in items if item in self.slots and self.flags[self.slots[item]] != self.NO_OUTPUT]
+    def clear_outputs(self, items):
+        slots = self._lookup([item for item in items if item in self.slots])
+        self.predictions[slots] = np.nan
+        self.flags[slots] = self.NO_OUTPUT
+        self.missing[slots] = 0
+    def set_outputs(self, items, predictions, flag_codes, usable):
+        slots = self._lookup(items)
+        self.predictions[slots] = predictions
+        self.flags[slots] = flag_codes
+        self.missing[slots] = np.packbits(~np.asarray(usable, dtype=bool)[:, :-1], axis=1, bitorder="little")
+    def set_flags(self, items, flag_codes):
+        slots = self._lookup(items)
+        changed = self.flags[slots] != flag_codes
+        self.flags[slots] = flag_codes
+        return changed
+    def get_predictions(self, items):
+        return self.predictions[self._lookup(items)]
+    def output_text(self, items):
+        return format_outputs(self.predictions[self._lookup(items)])
+    def flag_text(self, items):
+        return FLAG_LABELS[self.flags[self._lookup(items)]]
+    def missing_columns(self, items):
+        masks = self.missing[self._lookup(items)]
+        return np.unpackbits(masks, axis=1, count=len(self.model_columns), bitorder="little").astype(bool)
+    # (item, detail) of the rows without prediction, one text per distinct pattern of invalid columns
+    def error_details(self, items, error=None):
+        items = np.asarray(items, dtype=object)
+        slots = self._lookup(items)
+        failed = np.isnan(self.predictions[slots])
+        if not failed.any():
+            return []
+        patterns, inverse = np.unique(self.missing[slots[failed]], axis=0, return_inverse=True)
+        details = np.empty(len(patterns), dtype=object)
+        for k, pattern in enumerate(patterns):
+            columns = self.model_columns[np.unpackbits(pattern, count=len(self.model_columns), bitorder="little") > 0]
+            details[k] = ", ".join(columns) or error or "ModelError: invalid prediction"
+        return list(zip(items[failed], details[inverse.ravel()]))
+
+
+# Count the rows flagged HIGH (prediction >= threshold) for each candidate threshold
+def threshold_sweep(predictions, thresholds):
+    predictions = np.asarray(predictions, dtype=float)
+    sorted_predictions = np.sort(predictions[~np.isnan(predictions)])
+    thresholds = np.asarray(thresholds, dtype=float)
+    high_counts = len(sorted_predictions) - np.searchsorted(sorted_predictions, thresholds, side="left")
+    return high_counts
+
+
+# Compute the predictions and flag codes for a batch of parsed rows (the last column is the threshold)
+def compute_outputs_batch(values, codes, column_names,
+                          model_path=resource_path("model.pkl"),
+                          norm_params_path=resource_path("normalization_params.csv"),
+                          threshold=None, monitor=None):
+    values = np.asarray(values, dtype=float)
+    input_cols = list(column_names[:-1])
+    usable = (codes == CELL_OK) | (codes == CELL_NEGATIVE)
+    valid_rows = usable[:, :-1].all(axis=1)
+    predictions = np.full(len(values), np.nan)
+    error = None
+    if valid_rows.any():
+        try:
+            norm_params = load_norm_params(norm_params_path)
+            model = load_model(model_path)
+            normalized = normalize_inputs(values[valid_rows, :-1], input_cols, norm_params, monitor)
+            predictions[valid_rows] = predict_batch(model, normalized, input_cols)
+        except Exception as e:
+            error = "ModelError: " + str(e)
+    if threshold is None:
+        threshold = np.where(usable[:, -1], values[:, -1], np.nan)
+    # The table keeps predictions as float32: flags come from that value so that re-applying a threshold agrees,
+    # while the raw float64 predictions are returned (audit log)
+    flag_codes = threshold_codes(predictions.astype(np.float32), threshold)
+    return predictions, flag_codes, usable, error
+
+
+# Score the same parsed rows with several models concurrently, sharing one normalized input matrix
+def compare_models(values, codes, column_names, model_paths,
+                   norm_params_path=resource_path("normalization_params.csv"),
+                   threshold=None, n_jobs=None):
+    values = np.asarray(values, dtype=float)
+    input_cols = list(column_names[:-1])
+    usable = (codes == CELL_OK) | (codes == CELL_NEGATIVE)
+    valid_rows = usable[:, :-1].all(axis=1)
+    normalized = normalize_inputs(values[valid_rows, :-1], input_cols, load_norm_params(norm_params_path))
+    def score(model_path):
+        predictions = np.full(len(values), np.nan)
+        try:
+            if valid_rows.any():
+                predictions[valid_rows] = predict_batch(load_model(model_path), normalized, input_cols)
+            return predictions, None
+        except Exception as e:
+            return predictions, "ModelError: " + str(e)
+    with ThreadPoolExecutor(max_workers=n_jobs or len(model_paths)) as pool:
+        results = list(pool.map(score, model_paths))
+    predictions = np.column_stack([result[0] for result in results])
+    errors = [result[1] for result in results]
+    if threshold is None:
+        threshold = np.where(usable[:, -1], values[:, -1], np.nan)
+    flags = apply_threshold(predictions, np.asarray(threshold, dtype=float).reshape(-1, 1))
+    return predictions, flags, errors
+
+
+# Per-model summary of a comparison: flag counts and disagreements with the first (reference) model
+def model_disagreement(predictions, flags, model_names):
+    reference_flags = flags[:, :1]
+    differences = np.abs(predictions - predictions[:, :1])
+    compared = np.isfinite(differences)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_differences = np.where(compared, differences, 0).sum(axis=0) / compared.sum(axis=0)
+    return pd.DataFrame({
+        "OK": (flags == "OK").sum(axis=0),
+        "HIGH": (flags == "HIGH").sum(axis=0),
+        "ERR": (flags == "ERR").sum(axis=0),
+        "flag disagreements": (flags != reference_flags).sum(axis=0),
+        "mean |difference|": mean_differences,
+    }, index=model_names)
+
+
+# Read a whole CSV or Excel table as stripped strings
+def read_table(path, sheet_name=None):
+    chunks = list(iter_table_chunks(path, sheet_name, use_cache=False))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+# Write a table to CSV or Excel depending on the file extension
+def write_table(frame, path):
+    if path.endswith(".csv"):
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_excel(path, index=False)
+
+
+# Batch pipeline for one dataset: drop rows without valid inputs, correct the others with the defaults and score them
+def process_dataset(frame, validator, column_names,
+                    model_path=resource_path("model.pkl"),
+                    norm_params_path=resource_path("normalization_params.csv"),
+                    threshold=None, output_names=("output", "output_flag")):
+    if not any(col in frame.columns for col in column_names):
+        raise ValueError("No valid input columns found in the file.")
+    inputs = frame.reindex(columns=column_names, fill_value="").fillna("")
+    values, codes = validator.parse_rows(inputs.to_numpy(dtype=object))
+    keep = (codes == CELL_OK).any(axis=1)
+    values, codes = validator.correct(values[keep], codes[keep])
+    predictions, flag_codes, usable, error = compute_outputs_batch(values, codes, column_names, model_path,
+                                                                   norm_params_path, threshold)
+    if error:
+        raise RuntimeError(error)
+    result = pd.DataFrame(validator.format_cells(values, codes), columns=column_names)
+    prediction_name, flag_name = output_names
+    result[prediction_name] = format_outputs(predictions.astype(np.float32))
+    result[flag_name] = FLAG_LABELS[flag_codes]
+    return result, int((~keep).sum())
+
+
+# Queue of dataset files processed on a worker pool: while one worker scores a file, the others read or write.
+# A version of a file is identified by (path, mtime, size): files found in a folder are queued once they did not
+# change between two scans (still being copied otherwise), and a file that changes later is processed again
+class BatchProcessor:
+    SUMMARY_NAME = "batch_summary.csv"
+    def __init__(self, output_dir, process, workers=2, retries=1, retry_delay=2.0):
+        self.output_dir = output_dir
+        self.process = process
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.jobs = []
+        self.seen = set()
+        self.waiting = {}
+        self.outputs = set()
+        self.stopping = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+    # Files produced by the batch: the summary, the written results and, when it is not the input folder too,
+    # anything inside the output folder
+    def is_output(self, path, folder=None):
+        path = os.path.realpath(path)
+        output_dir = os.path.realpath(self.output_dir)
+        if os.path.basename(path) == self.SUMMARY_NAME or path in self.outputs:
+            return True
+        try:
+            in_output_dir = os.path.commonpath([path, output_dir]) == output_dir
+        except ValueError:
+            in_output_dir = False
+        return in_output_dir and (folder is None or os.path.realpath(folder) != output_dir)
+    # Version of a file (None if it cannot be read)
+    def file_version(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (path, stat.st_mtime, stat.st_size)
+    def is_active(self, path):
+        return any(job["path"] == path and job["status"] not in ("done", "failed") for job in self.jobs)
+    def add_file(self, path, folder=None, version=None):
+        path = os.path.abspath(path)
+        version = version or self.file_version(path)
+        if version is None or version in self.seen or self.is_output(path, folder) or self.is_active(path):
+            return False
+        self.seen.add(version)
+        self.waiting.pop(path, None)
+        job = {"file": os.path.basename(path), "path": path, "status": "queued", "attempts": 0,
+               "rows": "", "dropped": "", "seconds": "", "output": "", "error": ""}
+        self.jobs.append(job)
+        self.pool.submit(self._run_job, job)
+        return True
+    # Scan a folder: new or changed files wait in self.waiting until they are unchanged at the next scan
+    def add_folder(self, folder):
+        added = 0
+        for name in sorted(os.listdir(folder)):
+            base, ext = os.path.splitext(name)
+            if ext.lower() not in (".csv", ".xlsx") or name.startswith("~$") or base.endswith("_results"):
+                continue
+            path = os.path.abspath(os.path.join(folder, name))
+            version = self.file_version(path)
+            if version is None or version in self.seen or self.is_output(path, folder):
+                self.waiting.pop(path, None)
+            elif self.waiting.get(path) == version:
+                added += self.add_file(path, folder, version)
+            else:
+                self.waiting[path] = version
+        return added
+    def _run_job(self, job):
+        start = time.perf_counter()
+        base, ext = os.path.splitext(job["file"])
+        while True:
+            job["attempts"] += 1
+            try:
+                job["status"] = "reading"
+                frame = read_table(job["path"])
+                job["status"] = "scoring"
+                result, dropped = self.process(frame)
+                job["status"] = "writing"
+                output_path = os.path.join(self.output_dir, f"{base}_results{ext.lower()}")
+                self.outputs.add(os.path.realpath(output_path))
+                write_table(result, output_path)
+                job.update(status="done", rows=len(result), dropped=dropped, output=output_path, error="")
+                break
+            except Exception as e:
+                job["error"] = str(e)
+                if job["attempts"] > self.retries:
+                    job["status"] = "failed"
+                    break
+                job["status"] = "retrying"
+                if self.stopping.wait(self.retry_delay * job["attempts"]):
+                    job["status"] = "failed"
+                    break
+        job["seconds"] = round(time.perf_counter() - start, 2)
+    def is_done(self):
+        return not self.waiting and all(job["status"] in ("done", "failed") for job in self.jobs)
+    def summary(self):
+        columns = ["file", "status", "attempts", "rows", "dropped", "seconds", "output", "error"]
+        return pd.DataFrame(self.jobs, columns=columns + ["path"])[columns]
+    def write_summary(self):
+        summary_path = os.path.join(self.output_dir, self.SUMMARY_NAME)
+        self.summary().to_csv(summary_path, index=False)
+        return summary_path
+    def shutdown(self):
+        self.stopping.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
 # Compute outputs using a saved model
 def compute_outputs(inputs, column_names=None,
                     model_path=resource_path("model.pkl"),
-                    norm_params_path=resource_path("normalization_params.csv")):
+                    norm_params_path=resource_path("normalization_params.csv"),
+                    return_prediction=False):
     num_inputs = len(inputs)
     if num_inputs < 2:
+        if return_prediction:
+            return "", "ERR", column_names or ["input"], np.nan
         return "", "ERR", column_names or ["input"]
-    threshold_str = inputs[-1]
-    input_strs = inputs[:-1]
-    input_cols = column_names[:-1] if column_names else [f"Input{i+1}" for i in range(num_inputs - 1)]
-    valid_values = []
-    missing_fields = []
-    for i, val in enumerate(input_strs):
-        try:
-            valid_values.append(float(val))
-        except:
-            missing_fields.append(input_cols[i])
-    try:
-        threshold = float(threshold_str)
-        threshold_valid = True
-    except:
-        threshold_valid = False
-        if column_names:
-            missing_fields.append(column_names[-1])
-        else:
-            missing_fields.append(f"Input{num_inputs}")
-    if len(valid_values) != len(input_strs):
-        return "", "ERR", missing_fields
-    input_df = pd.DataFrame([valid_values], columns=input_cols)
-    norm_params = pd.read_csv(norm_params_path, index_col=0)
-    min_vals = norm_params["min"]
-    max_vals = norm_params["max"]
-    input_df = (input_df - min_vals) / (max_vals - min_vals)
-    input_df = input_df.clip(0, 1)
-    try:
-        model = joblib.load(model_path)
-        pred = model.predict(input_df)[0]
-        output_val = str(int(round(pred)))
-    except Exception as e:
-        return "", "ERR", ["ModelError: " + str(e)]
-    if threshold_valid:
-        output_flag = "OK" if pred < threshold else "HIGH"
+    column_names = column_names or [f"Input{i+1}" for i in range(num_inputs)]
+    values, codes = InputValidator(column_names, non_negative=False).parse_rows([inputs])
+    predictions, flag_codes, usable, error = compute_outputs_batch(values, codes, column_names, model_path, norm_params_path)
+    missing_fields = [col for col, ok in zip(column_names, usable[0]) if not ok]
+    if not usable[0, :-1].all():
+        output_val, output_flag = "", "ERR"
+    elif error:
+        output_val, output_flag, missing_fields = "", "ERR", [error]
     else:
-        output_flag = "ERR"
+        output_val, output_flag = format_outputs(predictions[:1].astype(np.float32))[0], FLAG_LABELS[flag_codes[0]]
+    if return_prediction:
+        return output_val, output_flag, missing_fields, float(predictions[0])
     return output_val, output_flag, missing_fields
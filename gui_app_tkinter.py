@@ -6,30 +6,32 @@ import pandas as pd
 import os
 import csv
 import tkinter.font as tkFont
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 from tkinter import Toplevel, scrolledtext, Button
 
 from gui_app_functions import *  # Import custom functions from a separate file
 
 
-# Lists of features and outputs
-top_list = ["A","B","C","D","E","F","G","H","I","J","K","L","Threshold"]
-bottom_list = ['a','b','c','d','e','f','g','h','i','j','k','l','threshold']
-output_list = ['output','output_flag']
+# Lists of features and outputs (from schema.json)
+schema = load_schema()
+top_list = schema.input_labels
+bottom_list = schema.input_names
+output_list = schema.output_names
 total_list = bottom_list + output_list
 total_list_index = ["#"] + total_list
 len_list = len(top_list)
 len_output = len(output_list)
 len_total = len_list + len_output
-entry_list = [None] * len_list
 value_list = [None] * len_list
-default_list = np.array([0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 5])
+default_list = schema.defaults
 all_scalable_widgets = []
 default_font_sizes = {}
 original_widget_sizes = {}
+row_store = RowStore(bottom_list)  # Parsed inputs and calculated outputs of the Treeview rows
+threshold_override = None  # Global threshold used instead of the per-row one when set
 
 # Explanations for features
-explanations = {col: f"Description for {col}" for col in bottom_list}
+explanations = schema.descriptions
 
 # Tooltip dictionary for buttons
 button_tooltips = {
@@ -38,7 +40,7 @@ button_tooltips = {
     "Edit": "Replace the selected rows with the current input values.",
     "Set Defaults": "Save the current input values as defaults.",
     "Clear Inputs": "Clear all input fields.",
-    "Clear Outputs": 'Clear the calculated outputs ("output", "output_flag") in the selected rows.',
+    "Clear Outputs": f'Clear the calculated outputs ("{schema.prediction_name}", "{schema.flag_name}") in the selected rows.',
     "Clean": "Remove invalid or non-numeric values from the selected rows.",
     "Correct": "Fill missing or invalid inputs in selected rows with default values.",
     "Select All": "Select all rows in the table.",
@@ -61,6 +63,16 @@ root.geometry("900x650")  # Window size
 # Default font
 font = tk.font.Font(size=9)
 
+# Audit log of the calculation runs (next to the program, like the example files)
+audit_log = AuditLog(os.path.join(os.getcwd(), "audit_log.sqlite"))
+audit_warning_shown = False  # The user was told that the audit log cannot be written
+
+# Monitor of the inputs outside the normalization range (all calculated rows since the last reset)
+range_monitor = RangeMonitor(bottom_list[:-1])
+
+# Validator of the input columns (values are parsed once when a row enters the table)
+validator = InputValidator(bottom_list, defaults=default_list, non_negative=schema.non_negative)
+
 
 
 
@@ -78,6 +90,25 @@ def update_row_numbers():
             tree_frame.item(item, values=values)
 
 
+# Parse the input cells of rows entering the table (one vectorized pass) and keep the typed values
+def store_parsed_inputs(items, rows):
+    if not items:
+        return
+    row_store.set_inputs(items, *validator.parse_rows(rows))
+
+
+# Typed input values and error codes of the given rows (rows not parsed yet are parsed now)
+def get_parsed_inputs(items):
+    unparsed = row_store.unparsed(items)
+    store_parsed_inputs(unparsed, [tree_frame.item(item, "values")[schema.input_slice] for item in unparsed])
+    return row_store.get_inputs(items)
+
+
+# Forget everything stored for a row that left the table
+def forget_row(item):
+    row_store.forget([item])
+
+
 # Add a new row to the Treeview with values from input fields
 def add_row():
     values = []
@@ -89,9 +120,8 @@ def add_row():
     if all(str(v).strip() == "" for v in values):
         messagebox.showwarning("Empty Input", "Please fill in at least one field.")
         return
-    values += [""] * len_output
-    display_values = [""] + values
-    tree_frame.insert("", "end", values=display_values)
+    item = tree_frame.insert("", "end", values=[""] + values + [""] * len_output)
+    store_parsed_inputs([item], [values])
     clear_fields()
     for e in entry_list:
         e.reset()
@@ -110,11 +140,31 @@ def edit_selected():
         if not str(val).strip():
             val = e.placeholder
         new_values.append(val)
-    new_values += [""] * len_output
+    new_rows, new_codes = (np.repeat(part, len(selected), axis=0) for part in validator.parse_rows([new_values]))
+    old_rows, old_codes = get_parsed_inputs(selected)
+    # Rows whose model inputs did not change keep their prediction: only the flag follows the new threshold
+    same_cells = (old_codes[:, :-1] == new_codes[:, :-1]) & (
+        (old_rows[:, :-1] == new_rows[:, :-1]) | (np.isnan(old_rows[:, :-1]) & np.isnan(new_rows[:, :-1])))
+    row_store.set_inputs(selected, new_rows, new_codes)
+    kept = set(row_store.with_outputs([item for item, same in zip(selected, same_cells.all(axis=1)) if same]))
+    row_store.clear_outputs([item for item in selected if item not in kept])
+    kept = [item for item in selected if item in kept]
+    outputs = {}
+    if kept:
+        if threshold_override is not None:
+            threshold = threshold_override
+        else:
+            threshold = new_rows[0, -1] if validator.usable(new_codes[0, -1]) else np.nan
+        flag_codes = threshold_codes(row_store.get_predictions(kept), threshold)
+        row_store.set_flags(kept, flag_codes)
+        outputs = dict(zip(kept, zip(row_store.output_text(kept), FLAG_LABELS[flag_codes])))
     for item in selected:
         current_values = list(tree_frame.item(item, "values"))
         row_number = current_values[0] if current_values else ""
-        updated_values = [row_number] + new_values
+        updated_values = [row_number] + new_values + [""] * len_output
+        if item in outputs:
+            updated_values[schema.value_index[schema.prediction_name]] = outputs[item][0]
+            updated_values[schema.value_index[schema.flag_name]] = outputs[item][1]
         tree_frame.item(item, values=updated_values)
     clear_fields()
     for e in entry_list:
@@ -129,6 +179,7 @@ def delete_selected():
         return
     for item in selected:
         tree_frame.delete(item)
+        forget_row(item)
     update_row_numbers()
 
 
@@ -153,14 +204,11 @@ def clear_outputs_selected():
     if not selected:
         messagebox.showinfo("No selection", "Please select one or more rows to clear outputs.")
         return
-    num_outputs = len(output_list)
-    num_columns = len(bottom_list) + num_outputs + 1
-    output_start = num_columns - num_outputs
     for item in selected:
         values = list(tree_frame.item(item, "values"))
-        for i in range(output_start, num_columns):
-            values[i] = ""
+        values[schema.output_slice] = [""] * len_output
         tree_frame.item(item, values=values)
+    row_store.clear_outputs(selected)
 
 
 # Select all rows
@@ -181,7 +229,7 @@ def copy_selected():
         messagebox.showinfo("No selection", "Please select a row to copy.")
         return
     values = tree_frame.item(selected[0], "values")
-    input_values = values[1:len(entry_list) + 1]
+    input_values = values[schema.input_slice]
     for i, e in enumerate(entry_list):
         value = input_values[i] if i < len(input_values) else ""
         if value in ("", None):
@@ -218,21 +266,9 @@ def set_defaults():
 
 # Read default values from the input fields
 def read_defaults_from_input():
-    new_defaults = []
-    invalid_fields = []
-    for i, entry in enumerate(entry_list):
-        value = entry.get().strip()
-        if value == "":
-            new_defaults.append("")
-        else:
-            try:
-                num = int(value)
-                if num < 0:
-                    raise ValueError
-                new_defaults.append(str(num))
-            except ValueError:
-                new_defaults.append("")
-                invalid_fields.append(top_list[i])
+    values, codes = validator.parse_rows([[entry.get() for entry in entry_list]])
+    new_defaults = list(validator.format_cells(values, codes)[0])
+    invalid_fields = [top_list[i] for i in np.flatnonzero(codes[0] > CELL_EMPTY)]
     if invalid_fields:
         message = (
             "The following fields contain invalid (non-numeric or negative) values:\n\n" +
@@ -254,10 +290,14 @@ def read_defaults_from_file():
     if not file_path:
         return
     try:
-        if file_path.endswith(".csv"):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
+        sheet_name = None
+        if file_path.endswith(".xlsx"):
+            sheet_name = ask_sheet(file_path)
+            if sheet_name is None:
+                return
+        chunks = iter_table_chunks(file_path, sheet_name, chunk_size=2, use_cache=False)
+        df = next(chunks, pd.DataFrame())
+        chunks.close()
     except Exception as e:
         messagebox.showerror("File Read Error", f"An error occurred while reading the file:\n{e}")
         return
@@ -267,23 +307,9 @@ def read_defaults_from_file():
     if df.shape[0] > 1:
         messagebox.showwarning("Multiple Rows", "The file contains multiple rows: only the first one will be used.")
     first_row = df.iloc[0].to_dict()
-    new_defaults = []
-    invalid_columns = []
-    for col in bottom_list:
-        raw_value = first_row.get(col, "")
-        value = str(raw_value).strip()
-        if value == "":
-            new_defaults.append("")
-        else:
-            try:
-                num = int(float(value))
-                if num < 0:
-                    raise ValueError
-                new_defaults.append(str(num))
-            except ValueError:
-                new_defaults.append("")
-                invalid_columns.append(col)
-
+    values, codes = validator.parse_rows([[first_row.get(col, "") for col in bottom_list]])
+    new_defaults = list(validator.format_cells(values, codes)[0])
+    invalid_columns = [bottom_list[i] for i in np.flatnonzero(codes[0] > CELL_EMPTY)]
     if invalid_columns:
         message = (
             "The following fields contain invalid (non-numeric or negative) values:\n\n" +
@@ -304,6 +330,7 @@ def apply_new_defaults(new_defaults):
         entry._put_placeholder()
     global default_values
     default_values = np.array(new_defaults)
+    validator.set_defaults(new_defaults)
     save = messagebox.askyesno("Save Defaults", "Do you want to save the new default values to a file?")
     if not save:
         return
@@ -332,29 +359,20 @@ def clean_selected():
     if not selected:
         messagebox.showinfo("No selection", "Please select at least one row to clean.")
         return
+    values, codes = validator.clean(*get_parsed_inputs(selected))
+    cells = validator.format_cells(values, codes)
+    empty_rows = (codes == CELL_EMPTY).all(axis=1)
     deleted_count = 0
-    num_inputs = len(bottom_list)
-    for item in selected:
-        values = list(tree_frame.item(item, "values"))
-        cleaned_values = values.copy()
-        for i in range(1, num_inputs + 1):
-            value = values[i].strip()
-            if value == "":
-                cleaned_values[i] = ""
-                continue
-            try:
-                num = float(value)
-                if num >= 0:
-                    cleaned_values[i] = str(int(round(num)))
-                else:
-                    cleaned_values[i] = ""
-            except ValueError:
-                cleaned_values[i] = ""
-        if all(cleaned_values[i] == "" for i in range(1, num_inputs + 1)):
+    for row, item in enumerate(selected):
+        if empty_rows[row]:
             tree_frame.delete(item)
+            forget_row(item)
             deleted_count += 1
-        else:
-            tree_frame.item(item, values=cleaned_values)
+            continue
+        cleaned_values = list(tree_frame.item(item, "values"))
+        cleaned_values[schema.input_slice] = cells[row]
+        tree_frame.item(item, values=cleaned_values)
+        row_store.set_inputs([item], values[row:row + 1], codes[row:row + 1])
     if deleted_count > 0:
         messagebox.showinfo(
             "Clean Complete",
@@ -369,37 +387,21 @@ def correct_selected():
     if not selected:
         messagebox.showinfo("No selection", "Please select at least one row to correct.")
         return
+    values, codes = get_parsed_inputs(selected)
+    all_invalid = (codes != CELL_OK).all(axis=1)
+    values, codes = validator.correct(values, codes)
+    cells = validator.format_cells(values, codes)
     deleted_count = 0
-    num_inputs = len(bottom_list)
-    for item in selected:
-        values = list(tree_frame.item(item, "values"))
-        all_invalid = True
-        for i in range(1, num_inputs + 1):
-            val = values[i].strip()
-            try:
-                num = float(val)
-                if num >= 0:
-                    all_invalid = False
-                    break
-            except ValueError:
-                continue
-        if all_invalid:
+    for row, item in enumerate(selected):
+        if all_invalid[row]:
             tree_frame.delete(item)
+            forget_row(item)
             deleted_count += 1
             continue
-        corrected_values = values.copy()
-        for i in range(1, num_inputs + 1):
-            val = values[i].strip()
-            entry_index = i - 1
-            try:
-                num = float(val)
-                if num >= 0:
-                    corrected_values[i] = str(int(round(num)))
-                else:
-                    corrected_values[i] = entry_list[entry_index].placeholder
-            except ValueError:
-                corrected_values[i] = entry_list[entry_index].placeholder
+        corrected_values = list(tree_frame.item(item, "values"))
+        corrected_values[schema.input_slice] = cells[row]
         tree_frame.item(item, values=corrected_values)
+        row_store.set_inputs([item], values[row:row + 1], codes[row:row + 1])
     if deleted_count > 0:
         messagebox.showinfo(
             "Correction Complete",
@@ -414,19 +416,29 @@ def calculate_selected():
     if not selected:
         messagebox.showinfo("No selection", "Please select at least one row to calculate.")
         return
-    failed_rows = []
-    for item in selected:
-        values = list(tree_frame.item(item, "values"))
-        inputs = values[1:1 + len(entry_list)]
-        output_val, output_flag, missing = compute_outputs(inputs, column_names=bottom_list)
-        filtered_missing = [col for col in missing if col != "threshold"]
-        updated_values = [values[0]] + inputs + [output_val, output_flag]
-        tree_frame.item(item, values=updated_values)
-        if filtered_missing and not output_val:
-            failed_rows.append({
-                "row": tree_frame.index(item) + 1,
-                "missing": filtered_missing
-            })
+    values, codes = get_parsed_inputs(selected)
+    model_path = resource_path("model.pkl")
+    norm_params_path = resource_path("normalization_params.csv")
+    # Fingerprints of the files as they are scored (the model may be replaced before the log is written)
+    model_hash, norm_params_hash = file_hash(model_path), file_hash(norm_params_path)
+    predictions, flag_codes, usable, error = compute_outputs_batch(values, codes, bottom_list, model_path, norm_params_path,
+                                                                   threshold=threshold_override, monitor=range_monitor)
+    row_store.set_outputs(selected, predictions, flag_codes, usable)
+    flags = FLAG_LABELS[flag_codes]
+    thresholds = threshold_override if threshold_override is not None else np.where(usable[:, -1], values[:, -1], np.nan)
+    output_index = schema.value_index[schema.prediction_name]
+    flag_index = schema.value_index[schema.flag_name]
+    row_numbers = []
+    for item, output_val, flag in zip(selected, row_store.output_text(selected), flags):
+        current_values = list(tree_frame.item(item, "values"))
+        current_values += [""] * (len(schema.columns) + 1 - len(current_values))
+        current_values[output_index] = output_val
+        current_values[flag_index] = flag
+        tree_frame.item(item, values=current_values)
+        row_numbers.append(current_values[0])
+    audit_log.record(model_path, norm_params_path, bottom_list, selected, values, thresholds, predictions, flags,
+                     row_numbers=row_numbers, model_hash=model_hash, norm_params_hash=norm_params_hash)
+    failed_rows = row_store.error_details(selected, error)
     if failed_rows:
         count = len(failed_rows)
         short_msg = (
@@ -435,10 +447,372 @@ def calculate_selected():
         )
         messagebox.showwarning("Invalid Input", short_msg)
         if messagebox.askyesno("Show Details?", "Do you want to see which rows failed?"):
-            detailed_msg = ""
-            for row_info in failed_rows:
-                detailed_msg += f"Row {row_info['row']}: missing or invalid → {', '.join(row_info['missing'])}\n"
-            show_scrollable_warning("Error Details", detailed_msg.strip())
+            detailed_msg = "\n".join(f"Row {tree_frame.index(item) + 1}: missing or invalid → {detail}"
+                                     for item, detail in failed_rows)
+            show_scrollable_warning("Error Details", detailed_msg)
+
+
+# Recompute the output flags of all calculated rows from the stored predictions
+def reapply_threshold():
+    items = row_store.with_outputs(tree_frame.get_children())
+    if not items:
+        messagebox.showinfo("No Results", "There are no calculated rows to re-evaluate.")
+        return
+    predictions = row_store.get_predictions(items)
+    if threshold_override is not None:
+        thresholds = threshold_override
+    else:
+        values, codes = get_parsed_inputs(items)
+        thresholds = np.where(validator.usable(codes[:, -1]), values[:, -1], np.nan)
+    flag_codes = threshold_codes(predictions, thresholds)
+    changed = row_store.set_flags(items, flag_codes)
+    flag_index = schema.value_index[schema.flag_name]
+    for item, flag in zip(np.asarray(items, dtype=object)[changed], FLAG_LABELS[flag_codes[changed]]):
+        values = list(tree_frame.item(item, "values"))
+        values[flag_index] = flag
+        tree_frame.item(item, values=values)
+
+
+# Set a global threshold that overrides the per-row threshold column
+def set_threshold_override():
+    global threshold_override
+    value = simpledialog.askfloat(
+        "Threshold Override",
+        "Threshold applied to every row (overrides the threshold column):",
+        initialvalue=threshold_override,
+        parent=root
+    )
+    if value is None:
+        return
+    threshold_override = value
+    if row_store.has_outputs():
+        reapply_threshold()
+
+
+# Remove the global threshold and go back to the per-row threshold column
+def clear_threshold_override():
+    global threshold_override
+    threshold_override = None
+    if row_store.has_outputs():
+        reapply_threshold()
+
+
+# Show how many rows would be flagged HIGH over a range of candidate thresholds
+def threshold_sweep_dialog():
+    predictions = row_store.get_predictions(row_store.with_outputs(tree_frame.get_children())).astype(float)
+    predictions = predictions[np.isfinite(predictions)]  # Rows that failed the calculation have no prediction
+    if not len(predictions):
+        messagebox.showinfo("No Results", "Run the calculation first: the sweep uses the stored predictions.")
+        return
+    window = tk.Toplevel()
+    window.title("Threshold Sweep")
+    window.geometry("600x500")
+    controls = tk.Frame(window)
+    controls.pack(fill="x", padx=10, pady=5)
+    range_entries = {}
+    for column, (label, value) in enumerate((("From", predictions.min()), ("To", predictions.max()), ("Steps", 21))):
+        tk.Label(controls, text=label).grid(row=0, column=2 * column, padx=(5, 2))
+        range_entries[label] = tk.Entry(controls, width=10)
+        range_entries[label].insert(0, f"{value:g}")
+        range_entries[label].grid(row=0, column=2 * column + 1, padx=(0, 5))
+    curve = tk.Canvas(window, height=150, bg="white")
+    curve.pack(fill="x", padx=10, pady=5)
+    sweep_columns = ("Threshold", "HIGH", "OK", "HIGH %")
+    table = ttk.Treeview(window, columns=sweep_columns, show="headings")
+    for col in sweep_columns:
+        table.heading(col, text=col)
+        table.column(col, width=100, anchor="center")
+    table.pack(fill="both", expand=True, padx=10, pady=5)
+    results = {}
+    def run_sweep():
+        try:
+            start = float(range_entries["From"].get())
+            stop = float(range_entries["To"].get())
+            steps = int(range_entries["Steps"].get())
+            if steps < 2:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Invalid Range", "Please enter a numeric range and at least 2 steps.", parent=window)
+            return
+        thresholds = np.linspace(start, stop, steps)
+        high_counts = threshold_sweep(predictions, thresholds)
+        total = len(predictions)
+        results.update(thresholds=thresholds, high_counts=high_counts)
+        table.delete(*table.get_children())
+        for threshold, high in zip(thresholds, high_counts):
+            table.insert("", "end", values=(f"{threshold:g}", int(high), total - int(high), f"{100 * high / total:.1f}"))
+        draw_curve(thresholds, high_counts / total)
+    def draw_curve(thresholds, high_fractions):
+        curve.delete("all")
+        curve.update_idletasks()
+        width, height, margin = curve.winfo_width(), curve.winfo_height(), 10
+        span = thresholds[-1] - thresholds[0] or 1
+        points = []
+        for threshold, fraction in zip(thresholds, high_fractions):
+            points.append(margin + (threshold - thresholds[0]) / span * (width - 2 * margin))
+            points.append(height - margin - fraction * (height - 2 * margin))
+        curve.create_line(*points, fill="#cc3300", width=2)
+        curve.create_text(margin, margin, text="HIGH %", anchor="nw", font=("Arial", 8))
+    def export_sweep():
+        if not results:
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx")],
+            title="Save threshold sweep",
+            parent=window
+        )
+        if not file_path:
+            return
+        high_counts = results["high_counts"]
+        df = pd.DataFrame({
+            "threshold": results["thresholds"],
+            "high": high_counts,
+            "ok": len(predictions) - high_counts,
+        })
+        try:
+            if file_path.endswith(".csv"):
+                df.to_csv(file_path, index=False)
+            else:
+                df.to_excel(file_path, index=False)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save file:\n{e}", parent=window)
+    tk.Button(controls, text="Run Sweep", command=run_sweep).grid(row=0, column=6, padx=5)
+    tk.Button(controls, text="Export", command=export_sweep).grid(row=0, column=7, padx=5)
+    window.after(50, run_sweep)
+
+
+# Sensitivity analysis: how the prediction changes when each input moves by ±delta
+def sensitivity_dialog():
+    selected = tree_frame.selection()
+    if not selected:
+        messagebox.showinfo("No selection", "Please select at least one row to analyse.")
+        return
+    feature_columns = bottom_list[:-1]
+    base_values, codes = get_parsed_inputs(selected)
+    valid_rows = validator.usable(codes[:, :-1]).all(axis=1)
+    if not valid_rows.any():
+        messagebox.showwarning("Invalid Input", "None of the selected rows has valid values for all the inputs.\n\nPlease use the 'Correct' function first.")
+        return
+    base_values = base_values[valid_rows, :-1]
+    window = tk.Toplevel()
+    window.title("Sensitivity Analysis")
+    window.geometry("650x450")
+    controls = tk.Frame(window)
+    controls.pack(fill="x", padx=10, pady=5)
+    option_entries = {}
+    for column, (label, value) in enumerate((("Delta", "1"), ("Steps per side", "1"), ("Threads", str(os.cpu_count() or 1)))):
+        tk.Label(controls, text=label).grid(row=0, column=2 * column, padx=(5, 2))
+        option_entries[label] = tk.Entry(controls, width=8)
+        option_entries[label].insert(0, value)
+        option_entries[label].grid(row=0, column=2 * column + 1, padx=(0, 5))
+    info_label = tk.Label(window, anchor="w")
+    info_label.pack(fill="x", padx=10)
+    table = ttk.Treeview(window, show="headings")
+    table.pack(fill="both", expand=True, padx=10, pady=5)
+    def run_analysis():
+        try:
+            delta = float(option_entries["Delta"].get())
+            steps_per_side = int(option_entries["Steps per side"].get())
+            n_jobs = int(option_entries["Threads"].get())
+            if delta <= 0 or steps_per_side < 1 or n_jobs < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Invalid Options", "Delta must be positive, steps and threads at least 1.", parent=window)
+            return
+        offsets = np.arange(1, steps_per_side + 1) * delta
+        steps = np.concatenate([-offsets[::-1], offsets])
+        try:
+            changes = sensitivity_analysis(base_values, feature_columns, steps, load_model(), load_norm_params(), n_jobs=n_jobs)
+        except Exception as e:
+            messagebox.showerror("Model Error", f"Sensitivity analysis failed:\n{e}", parent=window)
+            return
+        summary = sensitivity_summary(changes, feature_columns, steps)
+        summary_columns = ["feature"] + list(summary.columns)
+        table.configure(columns=summary_columns)
+        for col in summary_columns:
+            table.heading(col, text=col)
+            table.column(col, width=90, anchor="center")
+        table.delete(*table.get_children())
+        for feature, row in summary.iterrows():
+            table.insert("", "end", values=[schema.label_of[feature]] + [f"{value:.4g}" for value in row])
+        skipped = len(selected) - len(base_values)
+        info_label.config(text=f"{len(base_values)} row(s) analysed, {changes.size} perturbed predictions"
+                          + (f", {skipped} row(s) skipped (invalid inputs)" if skipped else ""))
+    tk.Button(controls, text="Run", command=run_analysis).grid(row=0, column=6, padx=5)
+    window.after(50, run_analysis)
+
+
+# Show the range monitor: share of inputs outside the normalization min/max and histograms per column
+def range_monitor_panel():
+    window = tk.Toplevel()
+    window.title("Range Monitor")
+    window.geometry("700x500")
+    info_label = tk.Label(window, anchor="w")
+    info_label.pack(fill="x", padx=10, pady=(10, 0))
+    summary_columns = ("column", "below min %", "above max %", "clipped %")
+    table = ttk.Treeview(window, columns=summary_columns, show="headings", height=8, selectmode="browse")
+    for col in summary_columns:
+        table.heading(col, text=col)
+        table.column(col, width=120, anchor="center")
+    table.pack(fill="both", expand=True, padx=10, pady=5)
+    histogram = tk.Canvas(window, height=160, bg="white")
+    histogram.pack(fill="x", padx=10, pady=5)
+    def refresh():
+        info_label.config(text=f"{range_monitor.count} calculated row(s) since the last reset. Select a column to see its histogram.")
+        table.delete(*table.get_children())
+        for column, row in range_monitor.summary().iterrows():
+            values = [schema.label_of[column]] + [f"{row[col]:.2f}" for col in summary_columns[1:]]
+            table.insert("", "end", iid=column, values=values)
+        histogram.delete("all")
+    def draw_histogram(event=None):
+        selected = table.selection()
+        histogram.delete("all")
+        if not selected:
+            return
+        counts = range_monitor.histograms[schema.index[selected[0]]]
+        labels = range_monitor.histogram_labels()
+        width, height, margin = histogram.winfo_width(), histogram.winfo_height(), 20
+        bar_width = (width - 2 * margin) / len(counts)
+        top = max(counts.max(), 1)
+        for k, (count, label) in enumerate(zip(counts, labels)):
+            x0 = margin + k * bar_width
+            y0 = height - margin - count / top * (height - 2 * margin)
+            color = "#cc3300" if k in (0, len(counts) - 1) else "#3366cc"
+            histogram.create_rectangle(x0 + 2, y0, x0 + bar_width - 2, height - margin, fill=color, outline="")
+            histogram.create_text(x0 + bar_width / 2, height - margin / 2, text=label, font=("Arial", 7))
+    def reset_monitor():
+        range_monitor.reset()
+        refresh()
+    def export_monitor():
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv")],
+            title="Save range monitor",
+            parent=window
+        )
+        if not file_path:
+            return
+        df = range_monitor.summary().join(range_monitor.histogram_frame())
+        df.index.name = "column"
+        try:
+            if file_path.endswith(".csv"):
+                df.to_csv(file_path)
+            else:
+                df.to_excel(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save file:\n{e}", parent=window)
+    table.bind("<<TreeviewSelect>>", draw_histogram)
+    button_row = tk.Frame(window)
+    button_row.pack(pady=(0, 10))
+    tk.Button(button_row, text="Refresh", width=12, command=refresh).pack(side="left", padx=5)
+    tk.Button(button_row, text="Reset", width=12, command=reset_monitor).pack(side="left", padx=5)
+    tk.Button(button_row, text="Export", width=12, command=export_monitor).pack(side="left", padx=5)
+    refresh()
+
+
+# Score the selected rows with several models and compare their outputs
+def compare_models_dialog():
+    selected = tree_frame.selection()
+    if not selected:
+        messagebox.showinfo("No selection", "Please select at least one row to compare.")
+        return
+    model_paths = list(filedialog.askopenfilenames(
+        title="Select the models to compare with the current one",
+        filetypes=[("Model files", "*.pkl"), ("All files", "*.*")]
+    ))
+    if not model_paths:
+        return
+    production_model = resource_path("model.pkl")
+    if os.path.exists(production_model) and production_model not in model_paths:
+        model_paths.insert(0, production_model)
+    model_names = []
+    for path in model_paths:
+        name = os.path.basename(path)
+        while name in model_names:
+            name += "'"
+        model_names.append(name)
+    values, codes = get_parsed_inputs(selected)
+    try:
+        predictions, flags, errors = compare_models(values, codes, bottom_list, model_paths, threshold=threshold_override)
+    except Exception as e:
+        messagebox.showerror("Comparison Error", f"The models could not be compared:\n{e}")
+        return
+    summary = model_disagreement(predictions, flags, model_names)
+    window = tk.Toplevel()
+    window.title("Model Comparison")
+    window.geometry("800x550")
+    tk.Label(window, anchor="w", justify="left",
+             text=f"{len(selected)} row(s) scored with {len(model_paths)} model(s). "
+                  f"Disagreements are counted against {model_names[0]}.").pack(fill="x", padx=10, pady=(10, 0))
+    for name, error in zip(model_names, errors):
+        if error:
+            tk.Label(window, anchor="w", fg="red", text=f"{name}: {error}").pack(fill="x", padx=10)
+    summary_columns = ["model"] + list(summary.columns)
+    summary_table = ttk.Treeview(window, columns=summary_columns, show="headings", height=min(len(model_names), 6))
+    for col in summary_columns:
+        summary_table.heading(col, text=col)
+        summary_table.column(col, width=110, anchor="center")
+    # Counts stay integers, only the mean difference is rounded
+    for name, row in zip(summary.index, summary.itertuples(index=False)):
+        summary_table.insert("", "end", values=[name] + [f"{value:.4g}" if isinstance(value, float) else str(value)
+                                                         for value in row])
+    summary_table.pack(fill="x", padx=10, pady=5)
+    row_numbers = [tree_frame.item(item, "values")[0] for item in selected]
+    export_data = {}
+    for k, name in enumerate(model_names):
+        export_data[f"{schema.prediction_name}[{name}]"] = format_outputs(predictions[:, k])
+        export_data[f"{schema.flag_name}[{name}]"] = flags[:, k]
+    export_df = pd.DataFrame(export_data)
+    row_columns = ["#"] + list(export_df.columns)
+    row_frame = tk.Frame(window)
+    row_frame.pack(fill="both", expand=True, padx=10, pady=5)
+    row_frame.grid_rowconfigure(0, weight=1)
+    row_frame.grid_columnconfigure(0, weight=1)
+    row_table = ttk.Treeview(row_frame, columns=row_columns, show="headings")
+    for col in row_columns:
+        row_table.heading(col, text=col)
+        row_table.column(col, width=100, anchor="center")
+    row_table.grid(row=0, column=0, sticky="nsew")
+    row_scroll = ttk.Scrollbar(row_frame, orient="vertical", command=row_table.yview)
+    row_scroll.grid(row=0, column=1, sticky="ns")
+    row_table.config(yscrollcommand=row_scroll.set)
+    for row_number, row in zip(row_numbers, export_df.itertuples(index=False)):
+        row_table.insert("", "end", values=[row_number] + list(row))
+    def export_comparison():
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv")],
+            title="Save model comparison",
+            parent=window
+        )
+        if not file_path:
+            return
+        inputs = pd.DataFrame([tree_frame.item(item, "values")[schema.input_slice] for item in selected], columns=bottom_list)
+        df = pd.concat([inputs, export_df], axis=1)
+        try:
+            if file_path.endswith(".csv"):
+                df.to_csv(file_path, index=False)
+            else:
+                df.to_excel(file_path, index=False)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save file:\n{e}", parent=window)
+    tk.Button(window, text="Export", width=12, command=export_comparison).pack(pady=(0, 10))
+
+
+# Warn once when the audit log cannot be written (the runs are kept and retried), checked every few seconds
+def check_audit_log():
+    global audit_warning_shown
+    if audit_log.error and not audit_warning_shown:
+        audit_warning_shown = True
+        messagebox.showwarning(
+            "Audit Log",
+            f"The calculations could not be written to the audit log:\n{audit_log.error}\n\n"
+            f"{audit_log.pending} run(s) are kept and will be written as soon as the log is available again."
+        )
+    elif not audit_log.error:
+        audit_warning_shown = False
+    root.after(2000, check_audit_log)
 
 
 # Show a scrollable warning popup with a title and message
@@ -521,6 +895,12 @@ def update_scrollregion(event):
     canvas.configure(scrollregion=canvas.bbox("all"))
 
 
+# Function to show as many input fields as fit in the window width
+def fit_input_fields(event=None):
+    if event is None or event.widget is root:
+        input_frame.fit_width(max(root.winfo_width(), button_frame.winfo_reqwidth()))
+
+
 # Function to create an example file with default values
 def print_example_file(filetype="xlsx"):
     data = {}
@@ -625,6 +1005,180 @@ def export_selected(selected_only=False, only_inputs=False):
     messagebox.showinfo("Exported", f"Data exported to:\n{file_path}")
 
 
+# Ask which sheet of an Excel workbook to read (None if cancelled)
+def ask_sheet(file_path):
+    sheets = list_excel_sheets(file_path)
+    if len(sheets) == 1:
+        return sheets[0]
+    window = tk.Toplevel()
+    window.title("Select Sheet")
+    window.grab_set()
+    tk.Label(window, text="The workbook contains several sheets.\nWhich one do you want to read?", font=("Arial", 11)).pack(padx=10, pady=10)
+    sheet_box = ttk.Combobox(window, values=sheets, state="readonly", width=30)
+    sheet_box.current(0)
+    sheet_box.pack(padx=10, pady=5)
+    choice = {}
+    def confirm_and_close():
+        choice["sheet"] = sheet_box.get()
+        window.destroy()
+    tk.Button(window, text="OK", width=15, command=confirm_and_close).pack(pady=5)
+    tk.Button(window, text="Cancel", width=15, command=window.destroy).pack(pady=(0, 10))
+    window.wait_window()
+    return choice.get("sheet")
+
+
+# Open a small progress window, returns the window and a function to update it
+def open_progress_window(title):
+    window = tk.Toplevel()
+    window.title(title)
+    window.resizable(False, False)
+    window.grab_set()
+    label = tk.Label(window, text="Reading...", width=40)
+    label.pack(padx=10, pady=(10, 5))
+    bar = ttk.Progressbar(window, length=300)
+    bar.pack(padx=10, pady=(0, 10))
+    def update_progress(done, total):
+        if total:
+            bar.config(mode="determinate", maximum=total, value=done)
+            label.config(text=f"{done} of {total} row(s) read")
+        else:
+            bar.config(mode="indeterminate")
+            bar.step(10)
+            label.config(text=f"{done} row(s) read")
+        window.update()
+    return window, update_progress
+
+
+# Paste rows copied from a spreadsheet (tab or comma separated, with or without header) at the end of the table
+def paste_rows(event=None):
+    try:
+        text = root.clipboard_get()
+    except tk.TclError:
+        messagebox.showinfo("Empty Clipboard", "The clipboard does not contain any text.")
+        return "break"
+    try:
+        frame = parse_pasted_table(text, schema.columns)
+    except Exception as e:
+        messagebox.showerror("Paste Error", f"The clipboard content could not be read as a table:\n{e}")
+        return "break"
+    found_inputs = [col for col in bottom_list if col in frame.columns]
+    if not found_inputs:
+        messagebox.showerror("Missing Inputs", "No input columns found in the pasted data.")
+        return "break"
+    frame = frame[(frame[found_inputs] != "").any(axis=1)]
+    if frame.empty:
+        messagebox.showinfo("No Data Pasted", "No rows with non-empty input fields were found in the clipboard.")
+        return "break"
+    empty_column = [""] * len(frame)
+    column_values = [frame[col].tolist() if col in frame.columns else empty_column for col in schema.columns]
+    first_number = len(tree_frame.get_children()) + 1
+    items = [tree_frame.insert("", "end", values=(str(number),) + row_values)
+             for number, row_values in enumerate(zip(*column_values), first_number)]
+    store_parsed_inputs(items, list(zip(*column_values[:len_list])))
+    tree_frame.see(items[-1])
+    return "break"
+
+
+# Process all the datasets of a folder in the background: import, clean, correct, calculate and export
+def batch_processing_window():
+    window = tk.Toplevel()
+    window.title("Batch Processing")
+    window.geometry("850x450")
+    controls = tk.Frame(window)
+    controls.pack(fill="x", padx=10, pady=5)
+    folder_entries = {}
+    def browse(label):
+        folder = filedialog.askdirectory(title=f"Select the {label.lower()}", parent=window)
+        if folder:
+            folder_entries[label].delete(0, tk.END)
+            folder_entries[label].insert(0, folder)
+    for row, label in enumerate(("Input folder", "Output folder")):
+        tk.Label(controls, text=label).grid(row=row, column=0, sticky="w", padx=(0, 5))
+        folder_entries[label] = tk.Entry(controls, width=60)
+        folder_entries[label].grid(row=row, column=1, columnspan=5, sticky="ew", pady=2)
+        tk.Button(controls, text="Browse...", command=lambda label=label: browse(label)).grid(row=row, column=6, padx=5)
+    tk.Label(controls, text="Workers").grid(row=2, column=0, sticky="w")
+    workers_box = tk.Spinbox(controls, from_=1, to=max(os.cpu_count() or 1, 2), width=5)
+    workers_box.delete(0, tk.END)
+    workers_box.insert(0, "2")
+    workers_box.grid(row=2, column=1, sticky="w", pady=2)
+    tk.Label(controls, text="Retries").grid(row=2, column=2, sticky="w")
+    retries_box = tk.Spinbox(controls, from_=0, to=5, width=5)
+    retries_box.delete(0, tk.END)
+    retries_box.insert(0, "1")
+    retries_box.grid(row=2, column=3, sticky="w")
+    watch_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(controls, text="Watch folder for new files", variable=watch_var).grid(row=2, column=4, sticky="w")
+    job_columns = ("file", "status", "attempts", "rows", "dropped", "seconds", "error")
+    job_table = ttk.Treeview(window, columns=job_columns, show="headings")
+    for col in job_columns:
+        job_table.heading(col, text=col)
+        job_table.column(col, width=250 if col in ("file", "error") else 70, anchor="center")
+    job_table.pack(fill="both", expand=True, padx=10, pady=5)
+    status_label = tk.Label(window, anchor="w")
+    status_label.pack(fill="x", padx=10, pady=(0, 10))
+    state = {"processor": None, "reported": 0}
+    def start():
+        input_folder = folder_entries["Input folder"].get().strip()
+        if not os.path.isdir(input_folder):
+            messagebox.showerror("Invalid Folder", "Please select an existing input folder.", parent=window)
+            return
+        output_folder = folder_entries["Output folder"].get().strip() or os.path.join(input_folder, "results")
+        try:
+            workers = int(workers_box.get())
+            retries = int(retries_box.get())
+            os.makedirs(output_folder, exist_ok=True)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Invalid Options", f"The batch could not be started:\n{e}", parent=window)
+            return
+        defaults = validator.format_cells(validator.default_values, validator.default_codes)
+        batch_validator = InputValidator(bottom_list, defaults=defaults, non_negative=schema.non_negative)
+        threshold = threshold_override
+        processor = BatchProcessor(
+            output_folder,
+            lambda frame: process_dataset(frame, batch_validator, bottom_list, threshold=threshold,
+                                         output_names=(schema.prediction_name, schema.flag_name)),
+            workers=workers, retries=retries
+        )
+        processor.add_folder(input_folder)
+        if not processor.waiting and not processor.jobs and not watch_var.get():
+            processor.shutdown()
+            messagebox.showinfo("No Files", "No CSV or Excel files were found in the input folder.", parent=window)
+            return
+        state.update(processor=processor, folder=input_folder)
+        start_button.config(state="disabled")
+        poll()
+    def poll():
+        if not window.winfo_exists():
+            return
+        processor = state["processor"]
+        if watch_var.get() or processor.waiting:
+            processor.add_folder(state["folder"])
+        job_table.delete(*job_table.get_children())
+        for job in processor.jobs:
+            job_table.insert("", "end", values=[job[col] for col in job_columns])
+        done = sum(job["status"] == "done" for job in processor.jobs)
+        failed = sum(job["status"] == "failed" for job in processor.jobs)
+        status_label.config(text=f"{len(processor.jobs)} file(s): {done} done, {failed} failed"
+                                 + (f" – {len(processor.waiting)} file(s) still changing" if processor.waiting else "")
+                                 + (" – watching the folder for new files" if watch_var.get() else ""))
+        if processor.jobs and processor.is_done() and state["reported"] != len(processor.jobs):
+            state["reported"] = len(processor.jobs)
+            try:
+                summary_path = processor.write_summary()
+                status_label.config(text=status_label.cget("text") + f" – summary saved to {summary_path}")
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save the summary report:\n{e}", parent=window)
+        window.after(1000, poll)
+    def close_window():
+        if state["processor"] is not None:
+            state["processor"].shutdown()
+        window.destroy()
+    start_button = tk.Button(controls, text="Start", width=10, command=start)
+    start_button.grid(row=2, column=6, padx=5)
+    window.protocol("WM_DELETE_WINDOW", close_window)
+
+
 # Function to import a file and populate the Treeview with its data
 def import_file(tree, input_columns=bottom_list, output_columns=output_list):
     file_path = filedialog.askopenfilename(
@@ -633,39 +1187,40 @@ def import_file(tree, input_columns=bottom_list, output_columns=output_list):
     )
     if not file_path:
         return
+    if not file_path.endswith((".csv", ".xlsx")):
+        messagebox.showerror("Error", "Unsupported file format.")
+        return
+    progress_window = None
     try:
-        if file_path.endswith(".csv"):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith(".xlsx"):
-            df = pd.read_excel(file_path)
-        else:
-            messagebox.showerror("Error", "Unsupported file format.")
-            return
-        df = df.fillna("")
-        df.columns = [c.strip() for c in df.columns]
-        file_columns = df.columns.tolist()
+        sheet_name = None
+        if file_path.endswith(".xlsx"):
+            sheet_name = ask_sheet(file_path)
+            if sheet_name is None:
+                return
+        progress_window, update_progress = open_progress_window("Importing Dataset")
         input_columns_clean = [col.strip() for col in input_columns]
         output_columns_clean = [col.strip() for col in output_columns]
-        found_inputs = [col for col in input_columns_clean if col in file_columns]
-        found_outputs = [col for col in output_columns_clean if col in file_columns]
-        if not found_inputs:
-            messagebox.showerror("Missing Inputs", "No valid input columns found in the file.")
-            return
-        import_outputs = False
-        if found_outputs:
-            import_outputs = messagebox.askyesno("Import outputs?", "Output columns found in the file. Import them?")
-        import_columns = found_inputs + (found_outputs if import_outputs else [])
+        file_columns = None
         imported_rows = 0
-        for _, row in df.iterrows():
-            if not any(str(row.get(col, "")).strip() for col in found_inputs):
-                continue
-            values = [""]
-            for col in input_columns:
-                values.append(str(row.get(col, "")).strip() if col in import_columns else "")
-            for col in output_columns:
-                values.append(str(row.get(col, "")).strip() if import_outputs and col in import_columns else "")
-            tree.insert("", "end", values=values)
-            imported_rows += 1
+        for chunk in iter_table_chunks(file_path, sheet_name, progress=update_progress):
+            if file_columns is None:
+                file_columns = set(chunk.columns)
+                found_inputs = [col for col in input_columns_clean if col in file_columns]
+                found_outputs = [col for col in output_columns_clean if col in file_columns]
+                if not found_inputs:
+                    messagebox.showerror("Missing Inputs", "No valid input columns found in the file.")
+                    return
+                import_outputs = False
+                if found_outputs:
+                    import_outputs = messagebox.askyesno("Import outputs?", "Output columns found in the file. Import them?")
+                import_columns = set(found_inputs + (found_outputs if import_outputs else []))
+            chunk = chunk[(chunk[found_inputs] != "").any(axis=1)]
+            empty_column = [""] * len(chunk)
+            column_values = [chunk[col].tolist() if col in import_columns else empty_column
+                             for col in input_columns_clean + output_columns_clean]
+            items = [tree.insert("", "end", values=("",) + row_values) for row_values in zip(*column_values)]
+            store_parsed_inputs(items, list(zip(*column_values[:len(input_columns_clean)])))
+            imported_rows += len(chunk)
         if imported_rows == 0:
             messagebox.showinfo("No Data Imported", "No valid rows were found with non-empty input fields.")
             return
@@ -681,6 +1236,9 @@ def import_file(tree, input_columns=bottom_list, output_columns=output_list):
         messagebox.showinfo("Import Completed", msg)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load file:\n{str(e)}")
+    finally:
+        if progress_window is not None:
+            progress_window.destroy()
     update_row_numbers()
 
 
@@ -724,30 +1282,19 @@ commands = [add_row, copy_selected, edit_selected, set_defaults, clear_fields_bu
 for i, (name, command) in enumerate(zip(buttons, commands)):
     bottone = tk.Button(button_frame, text=name, command=lambda cmd=command: cmd())
     bottone.grid(row=buttonrow, column=i, padx=buttonpadx, pady=buttonpady, sticky="w")
-    Tooltip(bottone, button_tooltips.get(name, ""))
+    add_tooltip(bottone, button_tooltips.get(name, ""))
 default_font = tkFont.nametofont(tk.Button(root).cget("font")).copy()
 default_font.configure(size=10, weight="bold")
 runner = tk.Button(button_frame, text="▶️ Run Calculation", command=lambda: calculate_selected(), bg="#ffcc00", fg="black", font=default_font)
 runner.grid(row=buttonrow, column=i+1, padx=buttonpadx*5, pady=buttonpady, sticky="w")
-Tooltip(runner, button_tooltips["▶️ Run Calculation"])
+add_tooltip(runner, button_tooltips["▶️ Run Calculation"])
 
 
-# Input fields
-input_frame = tk.Frame(scrollable_frame)
+# Input fields (widgets exist only for the columns that fit in the window)
+input_frame = VirtualEntryStrip(scrollable_frame, schema.inputs, font=font, entry_width=14, on_return=lambda event: add_row())
 input_frame.pack(fill="x", pady=5)
-max_widths = []
-for element in range(len_list):
-    feature_code = bottom_list[element]
-    feature_name = top_list[element]
-    description = explanations.get(feature_code, "No description available.")
-    top_label = tk.Label(input_frame, text=top_list[element], font=font)
-    top_label.grid(row=0, column=element, padx=2, pady=(5, 2))
-    all_scalable_widgets.append(top_label)
-    entry_list[element] = EntryWithPlaceholder(input_frame, placeholder=default_list[element], width=14, font=font)
-    entry_list[element].grid(row=1, column=element, padx=3, pady=(2, 5), sticky="ew")
-    all_scalable_widgets.append(entry_list[element])
-    Tooltip(top_label, f"{description} ➔ {feature_code}")
-    Tooltip(entry_list[element], f'Default value for "{feature_code}".\nYou can enter a different value.')
+entry_list = input_frame.cells
+all_scalable_widgets.append(input_frame)
 
 
 # Treeview (Table)
@@ -773,7 +1320,9 @@ tree_frame.grid_columnconfigure(0, weight=1)
 menu_bar = tk.Menu(root)
 # File menu
 file_menu = tk.Menu(menu_bar, tearoff=0)
-file_menu.add_command(label="Import Dataset", command=lambda: import_file(tree_frame, bottom_list))
+file_menu.add_command(label="Import Dataset", command=lambda: import_file(tree_frame))
+file_menu.add_command(label="Paste Rows", accelerator="Ctrl+V", command=paste_rows)
+file_menu.add_command(label="Batch Processing...", command=batch_processing_window)
 # Export the whole dataset - submenu
 export_dataset_submenu = tk.Menu(file_menu, tearoff=0)
 export_dataset_submenu.add_command(label="All Data", command=lambda: export_file(tree_frame, only_inputs=False))
@@ -793,6 +1342,17 @@ file_menu.add_cascade(label="Print Example", menu=print_example_submenu)
 file_menu.add_separator()
 file_menu.add_command(label="Exit", command=exit_app)
 menu_bar.add_cascade(label="File", menu=file_menu)
+# Calculation menu
+calculation_menu = tk.Menu(menu_bar, tearoff=0)
+calculation_menu.add_command(label="Re-apply Threshold", command=reapply_threshold)
+calculation_menu.add_command(label="Set Threshold Override...", command=set_threshold_override)
+calculation_menu.add_command(label="Clear Threshold Override", command=clear_threshold_override)
+calculation_menu.add_separator()
+calculation_menu.add_command(label="Threshold Sweep...", command=threshold_sweep_dialog)
+calculation_menu.add_command(label="Sensitivity Analysis...", command=sensitivity_dialog)
+calculation_menu.add_command(label="Range Monitor...", command=range_monitor_panel)
+calculation_menu.add_command(label="Compare Models...", command=compare_models_dialog)
+menu_bar.add_cascade(label="Calculation", menu=calculation_menu)
 # Help menu
 help_menu = tk.Menu(menu_bar, tearoff=0)
 help_menu.add_command(label="Open README", command=open_readme)
@@ -803,11 +1363,19 @@ root.config(menu=menu_bar)
 
 # Bindings
 root.bind("<Button-1>", click_anywhere)  # Deselect treeview items on click
-
-
-for entry in entry_list:
-    entry.bind("<Return>", lambda event: add_row())
+tree_frame.bind("<<Paste>>", paste_rows)  # Paste rows copied from a spreadsheet
+root.bind("<Configure>", fit_input_fields, add="+")  # Show more/fewer input fields on resize
+root.update_idletasks()
+fit_input_fields()
+root.after(2000, check_audit_log)
 
 
 # Run the main loop
 root.mainloop()
+unwritten_runs = audit_log.close()  # Write the pending audit records before leaving
+if unwritten_runs:
+    warning_root = tk.Tk()
+    warning_root.withdraw()
+    messagebox.showerror("Audit Log", f"{unwritten_runs} calculation run(s) could not be written to the audit log:\n"
+                                      f"{audit_log.error}", parent=warning_root)
+    warning_root.destroy()